@@ -1,19 +1,315 @@
 # Version Date: 2018-04-14
 
-import datetime, os, sys, time, re, locale, ConfigParser, urllib2, urllib
+import datetime, os, stat, sys, time, re, locale, ConfigParser, urllib, threading, httplib, socket, hashlib, json, Queue, codecs, io, select, struct, errno
+from collections import OrderedDict
 from string import Template
-from xml.dom import minidom
+from xml.etree import cElementTree
+
+# scandir is part of os from Python 3.5 - fall back to the scandir package and then to os.listdir
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# inotify is used to watch the summary files on Linux - the summary files are polled where it is not available
+try:
+    import ctypes, ctypes.util
+    LIBC = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    LIBC.inotify_init1
+    LIBC.inotify_add_watch
+except (ImportError, OSError, AttributeError):
+    LIBC = None
 
 # Series agent name
 SERIES_AGENT_NAME = 'Extended Personal Media Shows'
 
+# Name of the sidecar text cache in the plugin's data storage, the maximum number of files and characters it holds,
+# the longest text that is cached and how many changes or seconds to wait before the cache is saved again
+SIDECAR_TEXT_CACHE_NAME = 'SidecarTextCache'
+SIDECAR_TEXT_CACHE_MAX_ENTRIES = 50000
+SIDECAR_TEXT_CACHE_MAX_CHARACTERS = 16 * 1024 * 1024
+SIDECAR_TEXT_CACHE_MAX_TEXT_LENGTH = 64 * 1024
+SIDECAR_TEXT_CACHE_SAVE_AFTER_CHANGES = 500
+SIDECAR_TEXT_CACHE_SAVE_INTERVAL = 300
+
+# Default maximum number of bytes that are read from a summary file - the rest of a larger file is ignored - and the
+# number of bytes that are read and decoded at a time
+SUMMARY_FILE_MAX_SIZE = 256 * 1024
+TEXT_FILE_READ_SIZE = 64 * 1024
+
+# Byte order marks of the encodings that are detected at the start of text files - the longer marks are checked first.
+# Text files without a byte order mark are decoded as utf-8
+TEXT_FILE_BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'))
+
+# Name of the episode fingerprints in the plugin's data storage, the maximum number of episodes they are kept for
+# and how many changes or seconds to wait before they are saved again
+EPISODE_FINGERPRINTS_NAME = 'EpisodeFingerprints'
+EPISODE_FINGERPRINTS_MAX_ENTRIES = 250000
+EPISODE_FINGERPRINTS_SAVE_AFTER_CHANGES = 500
+EPISODE_FINGERPRINTS_SAVE_INTERVAL = 300
+
+# Name of the optional manifest file of a show with the show metadata and the season and episode summaries, the
+# maximum number of bytes that are read from it and the maximum number of parsed manifest and show metadata files
+# that are kept
+SHOW_MANIFEST_FILE_NAME = 'show.index.json'
+SHOW_MANIFEST_MAX_SIZE = 16 * 1024 * 1024
+SHOW_FILE_CACHE_MAX_ENTRIES = 1000
+
+# Plex Media Server API connection settings
+PLEX_API_HOST = '127.0.0.1'
+PLEX_API_PORT = 32400
+PLEX_API_TIMEOUT = 30
+PLEX_API_MAX_IDLE_CONNECTIONS = 4
+# number of unread response bytes that are drained to keep a connection alive after a streamed response
+PLEX_API_MAX_DRAIN_BYTES = 64 * 1024
+
+# Default number of season updates that are sent to the Plex Media Server at the same time
+SEASON_UPDATE_MAX_WORKERS = 4
+
+# Number of consecutive failed Plex Media Server API requests that open the circuit breaker and the number of
+# seconds before a request is tried again
+PLEX_API_CIRCUIT_BREAKER_THRESHOLD = 5
+PLEX_API_CIRCUIT_BREAKER_RESET_TIMEOUT = 60
+
+# Name of the queue of season writes in the plugin's data storage, the number of times a write is tried and the
+# seconds to wait before the first retry and at most between retries - the wait doubles after every failure
+SEASON_WRITE_QUEUE_NAME = 'SeasonWriteQueue'
+SEASON_WRITE_QUEUE_MAX_ATTEMPTS = 8
+SEASON_WRITE_QUEUE_RETRY_DELAY = 2
+SEASON_WRITE_QUEUE_MAX_RETRY_DELAY = 300
+
+# Maximum number of library section ids that are cached and the number of seconds they are kept
+LIBRARY_SECTION_CACHE_MAX_ENTRIES = 1000
+LIBRARY_SECTION_CACHE_MAX_AGE = 3600
+
+# Plex metadata type and XML element of the seasons and episodes that are written through the season write queue
+PLEX_METADATA_TYPES = {'season': ('3', 'Directory'), 'episode': ('4', 'Video')}
+
+# Seconds between two scans of the watched summary files when inotify is not available, seconds to wait for more
+# changes after a summary file changed before the change is sent and the maximum number of directories that are
+# watched with inotify - the summary files are polled when the limit is reached
+SIDECAR_WATCH_POLL_INTERVAL = 30
+SIDECAR_WATCH_SETTLE_TIME = 1
+SIDECAR_WATCH_MAX_DIRECTORIES = 8192
+
+# inotify flags and the events of the watched directories
+INOTIFY_NONBLOCK = 0o4000
+INOTIFY_CLOEXEC = 0o2000000
+INOTIFY_CLOSE_WRITE = 0x8
+INOTIFY_MOVED_FROM = 0x40
+INOTIFY_MOVED_TO = 0x80
+INOTIFY_CREATE = 0x100
+INOTIFY_DELETE = 0x200
+INOTIFY_QUEUE_OVERFLOW = 0x4000
+INOTIFY_WATCH_MASK = INOTIFY_CLOSE_WRITE | INOTIFY_MOVED_FROM | INOTIFY_MOVED_TO | INOTIFY_CREATE | INOTIFY_DELETE
+INOTIFY_EVENT_FORMAT = 'iIII'
+INOTIFY_EVENT_SIZE = struct.calcsize(INOTIFY_EVENT_FORMAT)
+
+# Name of the hashes of the season titles and summaries that were sent to Plex in the plugin's data storage
+SEASON_WRITE_TRACKER_NAME = 'SeasonWriteTracker'
+
+# Number of compiled episode title scrub rule sets that are kept - one per distinct scrub preference value
+SCRUB_RULES_CACHE_MAX_ENTRIES = 16
+
+# Default number of media file paths whose parse results are cached
+PARSE_RESULT_CACHE_MAX_ENTRIES = 100000
+
+# Maximum number of slow episodes that are listed in the metrics summary of an update
+METRICS_MAX_SLOW_EPISODES = 10
+
+# Tokens that the parser patterns require in the media file path. A pattern is only searched when the path contains
+# all of its tokens - each token is a part of the pattern that every match of the pattern contains. The tokens are
+# simple enough to be found in a single scan of the path, unlike the patterns that backtrack from every offset
+PATH_DATE_REGEX = r'[0-9]{4}[-\. ][0-9]{2}[-\. ][0-9]{2}'
+PATH_US_DATE_REGEX = r'[0-9]{2}[-\. ][0-9]{2}[-\. ][0-9]{4}'
+PATH_MONTH_DAY_REGEX = r'[0-9]{2}[-\. ][0-9]{2}'
+PATH_TIME_REGEX = r'[-\. _][0-9]{2}[-\. ][0-9]{2}[-\. ][0-9]{2}[-\. ]'
+PATH_EPISODE_REGEX = r'e[0-9]+[ ]*[-\.]{0,1}[ ]*'
+PATH_TOKEN_REGEXES = {
+    'date': PATH_DATE_REGEX,
+    'usDate': PATH_US_DATE_REGEX,
+    'monthDay': PATH_MONTH_DAY_REGEX,
+    'dateTime': PATH_DATE_REGEX + PATH_TIME_REGEX,
+    'usDateTime': PATH_US_DATE_REGEX + PATH_TIME_REGEX,
+    'monthDayTime': PATH_MONTH_DAY_REGEX + PATH_TIME_REGEX,
+    'seasonEpisode': r'[sc][0-9]+e[0-9]',
+    'episode': r'e[0-9]',
+    'episodeDate': PATH_EPISODE_REGEX + PATH_DATE_REGEX,
+    'episodeUsDate': PATH_EPISODE_REGEX + PATH_US_DATE_REGEX,
+    'numberedFile': r'[\\/][0-9]',
+    'yearFolder': r'[0-9]{4}[-\. \\/]',
+    'extension': r'\..'
+}
+# end of the patterns that require the extension token
+PATH_EXTENSION_PATTERN_SUFFIX = r'\.(?P<ext>.+)$'
+
+# Ids of the plugin preferences in DefaultPrefs.json
+PREFERENCE_IDS = (
+    'logger.debug.enabled',
+    'episode.use.last.modified.timestamp.enabled',
+    'episode.use.created.timestamp.enabled',
+    'episode.title.scrub.enabled',
+    'episode.title.scrub.characters',
+    'summary.file.extension',
+    'use.show.metadata.enabled',
+    'metadata.file.extension',
+    'episode.add.time.to.title.enabled',
+    'episode.add.time.to.title.format',
+    'plex.api.timeout',
+    'plex.api.max.concurrent.requests',
+    'parse.cache.max.entries',
+    'metrics.slow.episode.threshold',
+    'summary.file.max.size',
+    'summary.watch.enabled')
+
+# strftime formats of the "Add time to episode title" format preference values
+EPISODE_TIME_FORMATS = {'24 Hour': '%H:%M:%S', 'AM/PM': '%I:%M:%S %p'}
+
+class DebugLogger(object):
+    '''
+        Writes debug messages when debug logging is enabled. The debug logging preference is read once per agent
+        call by refresh() so that a disabled debug message only costs a flag check - the message is formatted by
+        Log and only when it is written
+    '''
+
+    def __init__(self):
+        self.enabled = None
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        '''
+        Reads the debug logging preference from the preferences snapshot - called at the start of every agent call
+        '''
+        self.enabled = getPreferences().debugEnabled
+
+    def log(self, methodName, message, args):
+        if self.enabled is None:
+            self.refresh()
+        if self.enabled:
+            Log(methodName + ' :: ' + message, *args)
+        else:
+            with self.lock:
+                self.suppressed = self.suppressed + 1
+
+    def getSuppressedCount(self):
+        with self.lock:
+            return self.suppressed
+
+DEBUG_LOGGER = DebugLogger()
+
 def logDebug(methodName, message, *args):
-    if bool(Prefs['logger.debug.enabled']):
-        Log(methodName + ' :: ' + message, *args)
+    DEBUG_LOGGER.log(methodName, message, args)
 
 def log(methodName, message, *args):
     Log(methodName + ' :: ' + message, *args)
 
+class Metrics(object):
+    '''
+        Timers and counters of the work done by the agent. Timers keep the number of timed calls, the total and the
+        longest time of each name. Each update() records into its own instance, which is added to the totals when
+        the update ends. Season updates record from the worker threads so the methods are thread safe
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.slowEpisodes = []
+
+    def addTime(self, name, seconds):
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] = timer[0] + 1
+                timer[1] = timer[1] + seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def addSlowEpisode(self, filePath, seconds):
+        with self.lock:
+            if len(self.slowEpisodes) < METRICS_MAX_SLOW_EPISODES:
+                self.slowEpisodes.append((filePath, seconds))
+            self.counters['slowEpisodes'] = self.counters.get('slowEpisodes', 0) + 1
+
+    def add(self, other):
+        '''
+        Adds the timers and counters of the other metrics to these metrics
+        '''
+        timers, counters = other.getValues()
+        with other.lock:
+            slowEpisodes = list(other.slowEpisodes)
+        with self.lock:
+            for name, (count, total, longest) in timers.items():
+                timer = self.timers.get(name)
+                if timer is None:
+                    self.timers[name] = [count, total, longest]
+                else:
+                    timer[0] = timer[0] + count
+                    timer[1] = timer[1] + total
+                    if longest > timer[2]:
+                        timer[2] = longest
+            for name, amount in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            self.slowEpisodes.extend(slowEpisodes[:METRICS_MAX_SLOW_EPISODES - len(self.slowEpisodes)])
+
+    def getValues(self):
+        with self.lock:
+            return dict((name, tuple(timer)) for name, timer in self.timers.items()), dict(self.counters)
+
+    def getStatistics(self):
+        '''
+        Gets the timers as name to {count, totalMs, maxMs} and the counters as name to count
+        '''
+        timers, counters = self.getValues()
+        with self.lock:
+            slowEpisodes = [(filePath, round(seconds * 1000, 1)) for filePath, seconds in self.slowEpisodes]
+        return {
+            'timers': dict((name, {'count': count, 'totalMs': round(total * 1000, 1), 'maxMs': round(longest * 1000, 1)})
+                           for name, (count, total, longest) in timers.items()),
+            'counters': counters,
+            'slowEpisodes': slowEpisodes
+        }
+
+    def format(self):
+        '''
+        Formats the metrics as one line of name=value pairs sorted by name - a timer is written as
+        count/total ms/longest ms and a slow episode as slow=time:"file path"
+        '''
+        timers, counters = self.getValues()
+        values = ['%s=%d/%.1fms/%.1fms' % (name, count, total * 1000, longest * 1000) for name, (count, total, longest) in sorted(timers.items())]
+        values.extend('%s=%d' % (name, amount) for name, amount in sorted(counters.items()))
+        with self.lock:
+            values.extend('slow=%.1fms:"%s"' % (seconds * 1000, filePath) for filePath, seconds in self.slowEpisodes)
+        return ' '.join(values)
+
+# metrics of all of the updates since the agent started
+METRICS = Metrics()
+
+def getMetrics():
+    '''
+    Gets the timers and counters of all of the updates since the agent started or the metrics were reset
+    '''
+    return METRICS.getStatistics()
+
+def resetMetrics():
+    global METRICS
+    METRICS = Metrics()
+
 def isBlank (string):
     '''
     Tests whether the string is blank
@@ -34,38 +330,229 @@ def isNotBlank (string):
 def unicodize(s):
     filename = s
 
-    logDebug('unicodize', 'before unicodizing: %s', str(filename))
+    logDebug('unicodize', 'before unicodizing: %s', filename)
     if os.path.supports_unicode_filenames:
         try: filename = unicode(s.decode('utf-8'))
         except: pass
-    logDebug('unicodize', 'after unicodizing: %s', str(filename))
+    logDebug('unicodize', 'after unicodizing: %s', filename)
     return filename
 
-def findFile(filePaths, fileNames):
+class DirectoryIndex(object):
+    '''
+        Lists each directory once and answers file name lookups from memory instead of probing the
+        file system for every candidate file name. File names are matched case-insensitively, an exact
+        match takes priority when a directory contains names that only differ by case.
+        The index also stats each path at most once - a file that is missing from the listing of its
+        directory is known not to exist without a stat, and scandir entries are used for the stat where
+        they are available.
+        An index is meant to live for a single update call so it does not go stale.
+    '''
+
+    def __init__(self):
+        self.directories = {}
+        self.stats = {}
+        self.statLookups = 0
+        self.statCalls = 0
+
+    def listDirectory(self, dirPath):
+        '''
+        Gets the listing for the directory as a tuple of two maps: file name to [name, is file, scandir entry] and
+        lower case file name to [name, is file, scandir entry], and whether the directory could be listed.
+        The is file flag is None until it is known
+        '''
+        listing = self.directories.get(dirPath)
+        if listing is None:
+            names = {}
+            lowerNames = {}
+            listed = True
+            try:
+                if scandir is not None:
+                    for entry in scandir(dirPath):
+                        try:
+                            isFile = entry.is_file()
+                        except OSError:
+                            isFile = None
+                        names[entry.name] = [entry.name, isFile, entry]
+                else:
+                    for name in os.listdir(dirPath):
+                        names[name] = [name, None, None]
+            except (OSError, IOError) as e:
+                logDebug('listDirectory', 'unable to list directory %s : %s', dirPath, e)
+                listed = False
+            for name, entry in names.items():
+                lowerNames.setdefault(name.lower(), entry)
+            listing = (names, lowerNames, listed)
+            self.directories[dirPath] = listing
+        return listing
+
+    def getEntry(self, dirPath, fileName):
+        names, lowerNames, listed = self.listDirectory(dirPath)
+        entry = names.get(fileName)
+        if entry is None:
+            entry = lowerNames.get(fileName.lower())
+        return entry
+
+    def stat(self, filePath):
+        '''
+        Gets the stat result of the path or None if it does not exist - each path is only stat'ed once
+        '''
+        self.statLookups = self.statLookups + 1
+        try:
+            return self.stats[filePath]
+        except KeyError:
+            pass
+
+        dirPath, fileName = os.path.split(filePath)
+        fileStat = None
+        names, lowerNames, listed = self.listDirectory(dirPath)
+        entry = names.get(fileName)
+        if entry is None and lowerNames.get(fileName.lower()) is None and listed:
+            # the file is not in the listing of its directory
+            logDebug('stat', 'file %s is not in the directory listing', filePath)
+        else:
+            self.statCalls = self.statCalls + 1
+            try:
+                if entry is not None and entry[2] is not None:
+                    fileStat = entry[2].stat()
+                else:
+                    fileStat = os.stat(filePath)
+            except OSError:
+                pass
+        self.stats[filePath] = fileStat
+        return fileStat
+
+    def isFile(self, filePath):
+        '''
+        Tests whether the path is an existing file using the listing of its parent directory
+        '''
+        dirPath, fileName = os.path.split(filePath)
+        if not fileName:
+            return False
+        entry = self.getEntry(dirPath, fileName)
+        if entry is None:
+            return False
+        if entry[1] is None:
+            fileStat = self.stat(os.path.join(dirPath, entry[0]))
+            entry[1] = fileStat is not None and stat.S_ISREG(fileStat.st_mode)
+        return entry[1]
+
+    def findFile(self, dirPath, fileNames):
+        '''
+        Gets the name of the first of the file names that is a file in the directory or None if none of them exist
+        '''
+        for fileName in fileNames:
+            entry = self.getEntry(dirPath, fileName)
+            if entry is not None and self.isFile(os.path.join(dirPath, entry[0])):
+                return entry[0]
+        return None
+
+    def getStatistics(self):
+        return {'directories': len(self.directories), 'statLookups': self.statLookups, 'statCalls': self.statCalls,
+                'statCallsSaved': self.statLookups - self.statCalls}
+
+def statFile(filePath, directoryIndex=None):
+    '''
+    Gets the stat result of the path or None if it does not exist - through the directory index when one is passed
+    '''
+    if directoryIndex is not None:
+        return directoryIndex.stat(filePath)
+    try:
+        return os.stat(filePath)
+    except OSError:
+        return None
+
+class DirectorySetNode(object):
+    __slots__ = ('children', 'slot')
+
+    def __init__(self):
+        self.children = {}
+        self.slot = None
+
+class DirectorySet(object):
+    '''
+        Ordered set of the directories of a show or season used to look up its summary and metadata files. The
+        directories are kept in a tree of path components so adding a directory only walks its own components.
+        A directory replaces the directories in the set that contain it, in the position of the first one, so the
+        set keeps the deepest directories in the order they were first added - the order findFile searches them in
+    '''
+
+    def __init__(self):
+        self.root = DirectorySetNode()
+        self.paths = []
+        self.count = 0
+
+    def add(self, dirPath):
+        dirPath = os.path.normpath(os.path.normcase(dirPath))
+        # walk the path components and collect the directories in the set that contain the new directory
+        node = self.root
+        ancestors = []
+        for component in dirPath.rstrip(os.sep).split(os.sep):
+            if node.slot is not None:
+                ancestors.append(node)
+            child = node.children.get(component)
+            if child is None:
+                child = DirectorySetNode()
+                node.children[component] = child
+            node = child
+
+        if node.slot is None and not ancestors:
+            logDebug('addFilePath', 'keeping new path [%s]', dirPath)
+            node.slot = len(self.paths)
+            self.paths.append(dirPath)
+            self.count = self.count + 1
+            return
+
+        # the new directory takes the position of the first directory it replaces
+        if node.slot is None:
+            first = min(ancestors, key=lambda ancestor: ancestor.slot)
+            logDebug('addFilePath', 'path [%s] is a subdirectory of [%s] - keeping new path [%s]', dirPath, self.paths[first.slot], dirPath)
+            node.slot = first.slot
+            self.paths[first.slot] = dirPath
+            first.slot = None
+            ancestors.remove(first)
+        for ancestor in ancestors:
+            self.paths[ancestor.slot] = None
+            ancestor.slot = None
+            self.count = self.count - 1
+
+    def __iter__(self):
+        for path in self.paths:
+            if path is not None:
+                yield path
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return repr(list(self))
+
+def findFile(filePaths, fileNames, directoryIndex=None):
     '''
     Find one of the specified file names in the list starting at the lowest directory passed in and
     walking up the directory tree until the root directory is found or one of the files in the list is found
     '''
+    if directoryIndex is None:
+        directoryIndex = DirectoryIndex()
+
     for filePath in filePaths:
         rootDirFound = False
         parentDir = filePath
 
         # Get the parent directory for the file
-        if os.path.isfile(filePath):
+        if directoryIndex.isFile(filePath):
             parentDir = os.path.dirname(parentDir)
 
         # iterate over the directory
         while not rootDirFound:
             logDebug('findFile', 'looking in parent directory %s', parentDir)
-            # create the file path
-            for fileName in fileNames:
+            # look the file names up in the directory listing
+            fileName = directoryIndex.findFile(parentDir, fileNames)
+            if fileName is not None:
                 pathToFind = os.path.normpath(os.path.normcase(os.path.join(parentDir, fileName)))
-                logDebug('findFile', 'determining whether file %s exists', pathToFind)
-                if os.path.exists(pathToFind) and os.path.isfile(pathToFind):
-                    logDebug('findFile', 'file %s exists', pathToFind)
-                    return pathToFind
-                else:
-                    logDebug('findFile', 'file %s does not exist', pathToFind)
+                logDebug('findFile', 'file %s exists', pathToFind)
+                return pathToFind
+            else:
+                logDebug('findFile', 'files %s do not exist', fileNames)
 
             # go up a directory
             logDebug('findFile', 'going up a directory')
@@ -94,34 +581,476 @@ def isSubdir(path, directory):
             return True
     return False
 
-def loadTextFromFile(filePath):
+def loadDataObject(name, default=None):
     '''
-    Load the text text from the specified file
+    Loads an object from the plugin's data storage - the default is returned if it does not exist or cannot be read
     '''
-    textUnicode = None
-    # If the file exists read in its contents
-    if os.path.exists(filePath) is True:
-        text = None
-        logDebug('loadTextFromFile', 'file exists - reading contents')
-        try:
-            # Read the text from the file
-            text = Core.storage.load(filePath, False)
-        except Exception as e:
-            logDebug('loadTextFromFile', 'error occurred reading contents of file %s : %s', filePath, e)
+    try:
+        if Data.Exists(name):
+            return Data.LoadObject(name)
+    except Exception as e:
+        log('loadDataObject', 'unable to load %s from the data storage : %s', name, e)
+    return default
+
+def saveDataObject(name, obj):
+    '''
+    Saves an object to the plugin's data storage
+    '''
+    try:
+        Data.SaveObject(name, obj)
+    except Exception as e:
+        log('saveDataObject', 'unable to save %s to the data storage : %s', name, e)
 
-        # try to decode the contents
-        try:
-            # decode using the system default
-            logDebug('loadTextFromFile', 'decoding string using utf-8 - not ignoring errors')
-            textUnicode = unicode(text, 'utf-8')
-        except Exception as e:
-            logDebug('loadTextFromFile', 'could not decode contents of summary file %s : %s', filePath, e)
-            # decode using utf-8 and ignore errors
-            logDebug('loadTextFromFile', 'decoding string using utf-8 - ignoring errors')
-            textUnicode = unicode(text, 'utf-8', errors='ignore')
+class LruCache(object):
+    '''
+        Thread safe map holding at most maxEntries entries - the least recently used entries are evicted first.
+        When maxSize is set the entries are also evicted until the total of sizeOf over all the values fits
+    '''
+
+    def __init__(self, maxEntries, maxSize=None):
+        self.maxEntries = maxEntries
+        self.maxSize = maxSize
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def sizeOf(self, value):
+        return 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.entries.pop(key)
+            except KeyError:
+                self.misses = self.misses + 1
+                return default
+            # re-insert the entry so it becomes the most recently used
+            self.entries[key] = value
+            self.hits = self.hits + 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self.size = self.size - self.sizeOf(self.entries.pop(key))
+            self.entries[key] = value
+            self.size = self.size + self.sizeOf(value)
+            while len(self.entries) > self.maxEntries or (self.maxSize is not None and self.size > self.maxSize and len(self.entries) > 1):
+                evictedKey, evictedValue = self.entries.popitem(last=False)
+                self.size = self.size - self.sizeOf(evictedValue)
+                self.evictions = self.evictions + 1
+
+    def items(self):
+        with self.lock:
+            return list(self.entries.items())
+
+    def clear(self, maxEntries=None):
+        '''
+        Removes all of the entries - the maximum number of entries is changed when maxEntries is passed
+        '''
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            if maxEntries is not None:
+                self.maxEntries = maxEntries
+
+    def getStatistics(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'size': self.size, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+class PersistentLruCache(LruCache):
+    '''
+        LRU cache that is persisted in the plugin's data storage so it survives restarts. Saving is batched - the
+        cache is only written once enough entries changed or enough time passed since the last save. The stored
+        entries are checked with isValidEntry when they are loaded
+    '''
+
+    def __init__(self, name, maxEntries, maxSize, saveAfterChanges, saveInterval):
+        LruCache.__init__(self, maxEntries, maxSize)
+        self.name = name
+        self.saveAfterChanges = saveAfterChanges
+        self.saveInterval = saveInterval
+        self.loaded = False
+        self.changes = 0
+        self.lastSaveTime = time.time()
+
+    def isValidEntry(self, key, value):
+        return True
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            storedEntries = loadDataObject(self.name, [])
+            try:
+                for key, value in storedEntries:
+                    if self.isValidEntry(key, value):
+                        LruCache.put(self, key, value)
+            except (TypeError, ValueError) as e:
+                log('load', 'stored cache %s is not valid - starting with an empty cache : %s', self.name, e)
+                self.entries.clear()
+                self.size = 0
+            logDebug('load', 'loaded %s entries of %s', len(self.entries), self.name)
+
+    def putChanged(self, key, value):
+        '''
+        Puts the entry and counts it as a change to save
+        '''
+        self.load()
+        with self.lock:
+            LruCache.put(self, key, value)
+            self.changes = self.changes + 1
+
+    def save(self, force=False):
+        '''
+        Saves the cache to the data storage if enough entries changed or enough time passed since the last save
+        '''
+        with self.lock:
+            if self.changes == 0:
+                return
+            if not force and self.changes < self.saveAfterChanges and time.time() - self.lastSaveTime < self.saveInterval:
+                return
+            entries = self.items()
+            self.changes = 0
+            self.lastSaveTime = time.time()
+        saveDataObject(self.name, entries)
+
+class SidecarTextCache(PersistentLruCache):
+    '''
+        Decoded contents of the summary files keyed by path. Each entry holds the (size, modified time, text) of the
+        file so a changed file replaces its own entry. The cache is bounded by the number of files and by the total
+        number of characters, and it is persisted so unchanged files are not read again on the next refresh
+    '''
+
+    def __init__(self, name, maxEntries, maxCharacters, maxTextLength, saveAfterChanges, saveInterval):
+        PersistentLruCache.__init__(self, name, maxEntries, maxCharacters, saveAfterChanges, saveInterval)
+        self.maxTextLength = maxTextLength
+
+    def sizeOf(self, value):
+        return len(value[2])
+
+    def isValidEntry(self, filePath, value):
+        return isinstance(filePath, basestring) and isinstance(value, tuple) and len(value) == 3 and isinstance(value[2], basestring)
+
+    def getText(self, filePath, fileSize, modifiedTime):
+        '''
+        Gets the cached text of the file - None is returned if the file is not cached or changed since it was cached
+        '''
+        self.load()
+        with self.lock:
+            value = self.entries.get(filePath)
+            if value is None or value[0] != fileSize or value[1] != modifiedTime:
+                self.misses = self.misses + 1
+                return None
+            return LruCache.get(self, filePath)[2]
+
+    def putText(self, filePath, fileSize, modifiedTime, text):
+        '''
+        Caches the text of the file - texts longer than maxTextLength are not cached
+        '''
+        if len(text) > self.maxTextLength:
+            logDebug('putText', 'file %s is too large to cache', filePath)
+            return
+        self.putChanged(filePath, (fileSize, modifiedTime, text))
+
+SIDECAR_TEXT_CACHE = SidecarTextCache(SIDECAR_TEXT_CACHE_NAME, SIDECAR_TEXT_CACHE_MAX_ENTRIES, SIDECAR_TEXT_CACHE_MAX_CHARACTERS,
+                                      SIDECAR_TEXT_CACHE_MAX_TEXT_LENGTH, SIDECAR_TEXT_CACHE_SAVE_AFTER_CHANGES, SIDECAR_TEXT_CACHE_SAVE_INTERVAL)
+
+def loadTextFromFile(filePath, directoryIndex=None, metrics=None):
+    '''
+    Load the text from the specified file. Files that did not change since they were last read
+    are served from the sidecar text cache
+    '''
+    # stat the file once - it provides the existence check and the values to validate the cached text
+    fileStat = statFile(filePath, directoryIndex)
+    if fileStat is None:
+        logDebug('loadTextFromFile', 'file %s does not exist', filePath)
+        return None
+
+    textUnicode = SIDECAR_TEXT_CACHE.getText(filePath, fileStat.st_size, fileStat.st_mtime)
+    if textUnicode is None:
+        logDebug('loadTextFromFile', 'file %s is not cached - reading contents', filePath)
+        maxSize = getPreferences().summaryFileMaxSize
+        textUnicode = readTextFromFile(filePath, maxSize, metrics)
+        # the start of a truncated file is not cached - it depends on the maximum size preference
+        if textUnicode is not None and fileStat.st_size <= maxSize:
+            SIDECAR_TEXT_CACHE.putText(filePath, fileStat.st_size, fileStat.st_mtime, textUnicode)
+    else:
+        logDebug('loadTextFromFile', 'using cached contents of file %s', filePath)
 
     return textUnicode
 
+def getTextEncoding(text):
+    '''
+    Gets the encoding of the text and the length of its byte order mark - utf-8 is returned if the text has no
+    byte order mark
+    '''
+    for byteOrderMark, encoding in TEXT_FILE_BYTE_ORDER_MARKS:
+        if text.startswith(byteOrderMark):
+            return encoding, len(byteOrderMark)
+    return 'utf-8', 0
+
+def readTextFromFile(filePath, maxSize=None, metrics=None):
+    '''
+    Read the text from the specified file. The file is read and decoded in chunks so that at most maxSize bytes
+    are read - the rest of a larger file is ignored. Bytes that cannot be decoded are ignored.
+    None is returned if the file cannot be read
+    '''
+    if metrics is None:
+        metrics = METRICS
+    logDebug('readTextFromFile', 'reading contents')
+    textParts = []
+    size = 0
+    truncated = False
+    decodeFailed = False
+    encoding = None
+    decoder = None
+    try:
+        with io.open(filePath, 'rb') as textFile:
+            while True:
+                readSize = TEXT_FILE_READ_SIZE
+                if maxSize is not None:
+                    readSize = min(readSize, maxSize - size)
+                    if readSize <= 0:
+                        # the file is truncated if there is anything after the maximum size
+                        truncated = len(textFile.read(1)) > 0
+                        break
+                text = textFile.read(readSize)
+                if not text:
+                    break
+                size = size + len(text)
+                if decoder is None:
+                    # the byte order mark is not part of the text
+                    encoding, byteOrderMarkLength = getTextEncoding(text)
+                    text = text[byteOrderMarkLength:]
+                    logDebug('readTextFromFile', 'decoding string using %s - not ignoring errors', encoding)
+                    decoder = codecs.getincrementaldecoder(encoding)('strict')
+                try:
+                    textParts.append(decoder.decode(text))
+                except UnicodeDecodeError as e:
+                    logDebug('readTextFromFile', 'could not decode contents of summary file %s : %s', filePath, e)
+                    # the chunks before decoded without errors - continue with the undecoded bytes and ignore errors
+                    logDebug('readTextFromFile', 'decoding string using %s - ignoring errors', encoding)
+                    decodeFailed = True
+                    state = decoder.getstate()
+                    decoder = codecs.getincrementaldecoder(encoding)('ignore')
+                    decoder.setstate(state)
+                    textParts.append(decoder.decode(text))
+    except (IOError, OSError) as e:
+        log('readTextFromFile', 'error occurred reading contents of file %s : %s', filePath, e)
+        return None
+
+    # an incomplete character at the end of the file is an error - at the end of a truncated file it is dropped
+    if decoder is not None and not truncated:
+        try:
+            textParts.append(decoder.decode(b'', True))
+        except UnicodeDecodeError as e:
+            logDebug('readTextFromFile', 'could not decode the end of summary file %s : %s', filePath, e)
+            decodeFailed = True
+
+    metrics.count('textFile.reads')
+    metrics.count('textFile.bytesRead', size)
+    if decodeFailed:
+        metrics.count('textFile.decodeErrors')
+    if truncated:
+        log('readTextFromFile', 'file %s is larger than %s bytes - the rest of the file is ignored', filePath, maxSize)
+        metrics.count('textFile.truncated')
+
+    return u''.join(textParts)
+
+# splits the extension off a media file path
+FILE_NAME_REGEX = re.compile(r'^(?P<fileWithoutExt>.*)\..+$')
+
+def getEpisodeSummaryFilePath(mediaFile):
+    '''
+    Gets the path of the summary file of the media file - the media file path with the summary file extension
+    '''
+    match = FILE_NAME_REGEX.search(mediaFile)
+    if match:
+        fileWithoutExt = match.group('fileWithoutExt').strip()
+        logDebug('getEpisodeSummaryFilePath', 'file name without extension %s', fileWithoutExt)
+        return fileWithoutExt + getSummaryFileExtension()
+    return None
+
+class EpisodeFingerprints(PersistentLruCache):
+    '''
+        Fingerprint of every episode as it was last processed, keyed by episode id, with the season number and
+        title that were parsed from its file. The fingerprint covers the file path, the modified time of the media
+        file and of its summary file and the preferences, so an episode whose fingerprint matches does not have to be
+        parsed again - Plex still has the values that were set the last time
+    '''
+
+    def __init__(self, name, maxEntries, saveAfterChanges, saveInterval):
+        PersistentLruCache.__init__(self, name, maxEntries, None, saveAfterChanges, saveInterval)
+        self.skipped = 0
+        self.processed = 0
+
+    def isValidEntry(self, episodeId, value):
+        return isinstance(episodeId, basestring) and isinstance(value, tuple) and len(value) == 3
+
+    def getSeason(self, episodeId, fingerprint):
+        '''
+        Gets the (season number, season title) of the episode if its fingerprint did not change - None otherwise
+        '''
+        self.load()
+        with self.lock:
+            value = self.entries.get(str(episodeId))
+            if value is None or value[0] != fingerprint:
+                self.misses = self.misses + 1
+                return None
+            self.skipped = self.skipped + 1
+            return LruCache.get(self, str(episodeId))[1:]
+
+    def putSeason(self, episodeId, fingerprint, seasonNumber, seasonTitle):
+        '''
+        Remembers the fingerprint of the episode that was processed and the season values parsed from its file
+        '''
+        with self.lock:
+            self.processed = self.processed + 1
+        if fingerprint is not None:
+            self.putChanged(str(episodeId), (fingerprint, seasonNumber, seasonTitle))
+
+    def getStatistics(self):
+        with self.lock:
+            statistics = LruCache.getStatistics(self)
+            statistics['skipped'] = self.skipped
+            statistics['processed'] = self.processed
+            return statistics
+
+EPISODE_FINGERPRINTS = EpisodeFingerprints(EPISODE_FINGERPRINTS_NAME, EPISODE_FINGERPRINTS_MAX_ENTRIES, EPISODE_FINGERPRINTS_SAVE_AFTER_CHANGES,
+                                           EPISODE_FINGERPRINTS_SAVE_INTERVAL)
+
+def getEpisodeFingerprint(mediaFile, prefs, directoryIndex=None, manifestFingerprint=None):
+    '''
+    Gets the fingerprint of the media file - None is returned if the media file cannot be read.
+    The fingerprint of the show manifest is included so that the episodes are processed again when it changes
+    '''
+    mediaStat = statFile(mediaFile, directoryIndex)
+    if mediaStat is None:
+        return None
+    summaryModifiedTime = None
+    summaryFilePath = getEpisodeSummaryFilePath(mediaFile)
+    if summaryFilePath is not None:
+        summaryStat = statFile(summaryFilePath, directoryIndex)
+        if summaryStat is not None:
+            summaryModifiedTime = summaryStat.st_mtime
+    mediaCreatedTime = None
+    if prefs.useCreatedTimestamp:
+        mediaCreatedTime = mediaStat.st_ctime
+    fingerprintValues = (mediaFile, mediaStat.st_mtime, mediaCreatedTime, summaryModifiedTime, prefs.hash)
+    if manifestFingerprint is not None:
+        fingerprintValues = fingerprintValues + (manifestFingerprint,)
+    return hashlib.md5(repr(fingerprintValues)).hexdigest()
+
+class ParsedFileCache(LruCache):
+    '''
+        Keeps the parsed contents of files by path. A file is parsed again when its size or modified time changed
+    '''
+
+    def load(self, filePath, parse, directoryIndex=None):
+        '''
+        Gets the parsed contents of the file - parse is called with the file path when the file is not cached.
+        None is returned if the file does not exist
+        '''
+        fileStat = statFile(filePath, directoryIndex)
+        if fileStat is None:
+            return None
+        entry = self.get(filePath)
+        if entry is not None and entry[0] == fileStat.st_size and entry[1] == fileStat.st_mtime:
+            logDebug('load', 'using cached contents of file %s', filePath)
+            return entry[2]
+        value = parse(filePath)
+        self.put(filePath, (fileStat.st_size, fileStat.st_mtime, value))
+        return value
+
+SHOW_FILE_CACHE = ParsedFileCache(SHOW_FILE_CACHE_MAX_ENTRIES)
+
+def getManifestSeasonKey(seasonNumber):
+    '''
+    Gets the key of the season in the show manifest - season numbers are compared without leading zeros
+    '''
+    seasonKey = unicode(seasonNumber).strip()
+    if seasonKey.isdigit():
+        return unicode(int(seasonKey))
+    return seasonKey.lower()
+
+class ShowManifest(object):
+    '''
+        Show metadata, season titles and summaries and episode summaries of a show read from its manifest file.
+        Every part of the manifest is optional:
+        {"show": {"summary": "...", "release": "2017-05-01", "studio": "...", "genres": "Linux, Automation"},
+         "seasons": {"1": {"title": "...", "summary": "..."}},
+         "episodes": {"Show title - s01e01 - Some title.mp4": {"summary": "..."}}}
+    '''
+
+    def __init__(self, filePath, values):
+        self.filePath = filePath
+        self.show = self.getSection(values, 'show')
+        self.seasons = dict((getManifestSeasonKey(key), value) for key, value in self.getSection(values, 'seasons').items() if isinstance(value, dict))
+        self.episodes = dict((key, value) for key, value in self.getSection(values, 'episodes').items() if isinstance(value, dict))
+
+    def getSection(self, values, name):
+        section = values.get(name)
+        if section is None:
+            return {}
+        if not isinstance(section, dict):
+            log('getSection', 'ignoring section %s of show manifest %s - it is not an object', name, self.filePath)
+            return {}
+        return section
+
+    def getValue(self, values, name):
+        value = values.get(name)
+        if isinstance(value, list):
+            value = ','.join(unicode(item) for item in value)
+        if isinstance(value, basestring) and isNotBlank(value):
+            return value
+        return None
+
+    def getShowValue(self, name):
+        return self.getValue(self.show, name)
+
+    def getSeasonValue(self, seasonNumber, name):
+        return self.getValue(self.seasons.get(getManifestSeasonKey(seasonNumber), {}), name)
+
+    def getEpisodeSummary(self, mediaFile):
+        return self.getValue(self.episodes.get(os.path.basename(mediaFile), {}), 'summary')
+
+def readShowManifest(filePath):
+    '''
+    Reads the show manifest file - None is returned if the file is not a valid manifest
+    '''
+    text = readTextFromFile(filePath, SHOW_MANIFEST_MAX_SIZE)
+    if text is None:
+        return None
+    try:
+        values = json.loads(text)
+    except (TypeError, ValueError) as e:
+        log('readShowManifest', 'unable to read show manifest %s : %s', filePath, e)
+        return None
+    if not isinstance(values, dict):
+        log('readShowManifest', 'unable to read show manifest %s : it is not an object', filePath)
+        return None
+    return ShowManifest(filePath, values)
+
+def findShowManifest(filePaths, directoryIndex=None):
+    '''
+    Finds the show manifest in the directories of the file paths or their parent directories and returns it -
+    the parsed manifest is cached until the file changes
+    '''
+    filePath = findFile(filePaths, [SHOW_MANIFEST_FILE_NAME], directoryIndex)
+    if filePath is None:
+        logDebug('findShowManifest', 'show manifest not found')
+        return None
+    log('findShowManifest', 'found show manifest %s', filePath)
+    return SHOW_FILE_CACHE.load(filePath, readShowManifest, directoryIndex)
+
 def getPlexToken():
     logDebug('getPlexToken', 'getting Plex token from the environment')
     return os.environ['PLEXTOKEN']
@@ -133,61 +1062,51 @@ def getSummaryFileExtension():
     '''
     Gets the summary file extension to use from the plugin preferences
     '''
-    fileExt = Prefs['summary.file.extension']
-    if isBlank(fileExt):
-        fileExt = 'summary'
-    logDebug('getSummaryFileExtension', 'using summary file extension %s', fileExt)
-    fileExt = '.'+fileExt
-    return fileExt
+    return getPreferences().summaryFileExtension
 
 def getMetadataFileExtension():
     '''
     Gets the metadata file extension to use from the plugin preferences
     '''
-    fileExt = Prefs['metadata.file.extension']
-    if isBlank(fileExt):
-        fileExt = 'metadata'
-    logDebug('getMetadataFileExtension', 'using metadata file extension %s', fileExt)
-    fileExt = '.'+fileExt
-    return fileExt
+    return getPreferences().metadataFileExtension
     
-def findSeasonSummary(filePaths, fileNames):
+def findSeasonSummary(filePaths, fileNames, directoryIndex=None, metrics=None):
     '''
     Finds the first matching season metadata file from the provided list of file paths and file names
     '''
     seasonSummary = None
-    logDebug('findSeasonSummary', 'looking for files with names %s in path list %s', str(fileNames), str(filePaths))
-    filePath = findFile(filePaths, fileNames)
+    logDebug('findSeasonSummary', 'looking for files with names %s in path list %s', fileNames, filePaths)
+    filePath = findFile(filePaths, fileNames, directoryIndex)
     if filePath != None:
         log('findSeasonSummary', 'found season summary file %s', filePath)
-        seasonSummary = loadTextFromFile(filePath)
+        seasonSummary = loadTextFromFile(filePath, directoryIndex, metrics)
     else:
         log('findSeasonSummary', 'season summary file not found')
 
     return seasonSummary
 
-def findShowSummary(filePaths, fileNames):
+def findShowSummary(filePaths, fileNames, directoryIndex=None, metrics=None):
     '''
     Finds the first matching show summary file from the provided list of file paths and file names
     '''
     showSummary = None
-    logDebug('findShowSummary', 'looking for files with names %s in path list %s', str(fileNames), str(filePaths))
-    filePath = findFile(filePaths, fileNames)
+    logDebug('findShowSummary', 'looking for files with names %s in path list %s', fileNames, filePaths)
+    filePath = findFile(filePaths, fileNames, directoryIndex)
     if filePath != None:
         log('findShowSummary', 'found show summary file %s', filePath)
-        showSummary = loadTextFromFile(filePath)
+        showSummary = loadTextFromFile(filePath, directoryIndex, metrics)
     else:
         log('findShowSummary', 'show summary file not found')
 
     return showSummary
 
-def findShowMetadata(filePaths, fileNames):
+def findShowMetadata(filePaths, fileNames, directoryIndex=None):
     '''
     Finds the first matching show metadata file from the provided list of file paths and file names
     '''
     filePath = None
-    logDebug('findShowMetadata', 'looking for files with names %s in path list %s', str(fileNames), str(filePaths))
-    filePath = findFile(filePaths, fileNames)
+    logDebug('findShowMetadata', 'looking for files with names %s in path list %s', fileNames, filePaths)
+    filePath = findFile(filePaths, fileNames, directoryIndex)
     if filePath != None:
         log('findShowMetadata', 'found show metadata file %s', filePath)
     else:
@@ -195,65 +1114,1169 @@ def findShowMetadata(filePaths, fileNames):
 
     return filePath
 
+def getPlexApiTimeout():
+    '''
+    Gets the timeout in seconds for the Plex Media Server API requests from the plugin preferences
+    '''
+    return getPreferences().plexApiTimeout
+
+def encodeParams(params):
+    '''
+    URL encodes the list of parameter name/value pairs - unicode values are encoded as UTF-8
+    '''
+    encodedParams = []
+    for name, value in params:
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        encodedParams.append((name, value))
+    return urllib.urlencode(encodedParams)
+
+def readXmlAttributes(stream, tagNames):
+    '''
+    Reads the attributes of the first element with each of the tag names from the XML stream. The stream is parsed
+    incrementally and parsing stops as soon as all of the elements were found. Returns a map of tag name to
+    attribute map - tags that were not found are missing from the map
+    '''
+    attributes = {}
+    for event, element in cElementTree.iterparse(stream, events=('start',)):
+        if element.tag in tagNames and element.tag not in attributes:
+            attributes[element.tag] = dict(element.attrib)
+            if len(attributes) == len(tagNames):
+                break
+    return attributes
+
+class PlexApiError(Exception):
+    '''
+        Raised when the Plex Media Server API responds with an error status
+    '''
+
+    def __init__(self, method, path, status, reason):
+        Exception.__init__(self, '%s %s failed with status %s %s' % (method, path, status, reason))
+        self.status = status
+
+    def isServerError(self):
+        '''
+        Tests whether the request may succeed when it is sent again
+        '''
+        return self.status >= 500 or self.status in (408, 429)
+
+class PlexApiUnavailableError(Exception):
+    '''
+        Raised instead of sending a request while the Plex API circuit breaker is open
+    '''
+
+    def __init__(self, method, path, retryTime):
+        Exception.__init__(self, '%s %s not sent - the Plex Media Server is unavailable' % (method, path))
+        self.retryTime = retryTime
+
+# errors raised by the Plex Media Server API requests
+PLEX_API_ERRORS = (PlexApiError, PlexApiUnavailableError, httplib.HTTPException, socket.error)
+
+class CircuitBreaker(object):
+    '''
+        Stops sending requests to a server that keeps failing. The breaker opens after failureThreshold consecutive
+        failures and rejects requests for resetTimeout seconds. Then a single trial request is let through - the
+        breaker closes when it succeeds and opens again when it fails
+    '''
+
+    def __init__(self, failureThreshold, resetTimeout):
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.openedAt = None
+        self.trial = False
+        self.opened = 0
+        self.rejected = 0
+
+    def allowRequest(self):
+        with self.lock:
+            if self.openedAt is None:
+                return True
+            if self.trial or time.time() < self.openedAt + self.resetTimeout:
+                self.rejected = self.rejected + 1
+                return False
+            self.trial = True
+            return True
+
+    def getRetryTime(self):
+        '''
+        Gets the time from which requests are let through again or None if the breaker is closed. While the trial
+        request is in flight the time is a second from now
+        '''
+        with self.lock:
+            if self.openedAt is None:
+                return None
+            if self.trial:
+                return time.time() + 1
+            return self.openedAt + self.resetTimeout
+
+    def recordSuccess(self):
+        with self.lock:
+            if self.openedAt is not None:
+                log('recordSuccess', 'Plex Media Server is available again - closing the circuit breaker')
+            self.failures = 0
+            self.openedAt = None
+            self.trial = False
+
+    def recordFailure(self):
+        with self.lock:
+            self.failures = self.failures + 1
+            if self.trial or (self.openedAt is None and self.failures >= self.failureThreshold):
+                log('recordFailure', 'Plex Media Server failed %s times - not sending requests for %s seconds', self.failures, self.resetTimeout)
+                self.openedAt = time.time()
+                self.trial = False
+                self.opened = self.opened + 1
+
+    def getStatistics(self):
+        with self.lock:
+            state = 'closed'
+            if self.openedAt is not None:
+                state = 'half-open' if self.trial else 'open'
+            return {'state': state, 'failures': self.failures, 'opened': self.opened, 'rejected': self.rejected}
+
+PLEX_API_CIRCUIT_BREAKER = CircuitBreaker(PLEX_API_CIRCUIT_BREAKER_THRESHOLD, PLEX_API_CIRCUIT_BREAKER_RESET_TIMEOUT)
+
+class PlexHttpClient(object):
+    '''
+        HTTP client for the Plex Media Server API. Connections are kept alive and pooled so they are reused
+        across seasons and across update calls. The latency of every request is recorded.
+        Requests go through the circuit breaker - PlexApiUnavailableError is raised while it is open
+    '''
+
+    def __init__(self, host, port, timeout, maxIdleConnections, circuitBreaker):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.maxIdleConnections = maxIdleConnections
+        self.circuitBreaker = circuitBreaker
+        self.idleConnections = []
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.connectionsOpened = 0
+        self.totalLatency = 0.0
+        self.maxLatency = 0.0
+
+    def acquireConnection(self, timeout):
+        '''
+        Gets an idle connection from the pool or opens a new one. Returns the connection and whether it was reused
+        '''
+        with self.lock:
+            if self.idleConnections:
+                connection = self.idleConnections.pop()
+                reused = True
+            else:
+                connection = httplib.HTTPConnection(self.host, self.port, timeout=timeout)
+                self.connectionsOpened = self.connectionsOpened + 1
+                reused = False
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection, reused
+
+    def releaseConnection(self, connection):
+        '''
+        Returns the connection to the pool - it is closed if the pool is full
+        '''
+        with self.lock:
+            if len(self.idleConnections) < self.maxIdleConnections:
+                self.idleConnections.append(connection)
+                return
+        connection.close()
+
+    def recordRequest(self, latency, failed):
+        with self.lock:
+            self.requests = self.requests + 1
+            if failed:
+                self.errors = self.errors + 1
+            self.totalLatency = self.totalLatency + latency
+            self.maxLatency = max(self.maxLatency, latency)
+
+    def drainResponse(self, response):
+        '''
+        Reads the rest of a streamed response so the connection can be reused.
+        Returns False if the response was too large to drain
+        '''
+        remaining = PLEX_API_MAX_DRAIN_BYTES
+        while remaining > 0:
+            data = response.read(min(remaining, 8192))
+            if not data:
+                return True
+            remaining = remaining - len(data)
+        return response.isclosed()
+
+    def request(self, method, path, params=None, body=None, headers=None, timeout=None, responseHandler=None):
+        '''
+        Sends the request and returns the response body. When a response handler is passed the response is
+        not read into memory - the handler is called with the response stream and its result is returned.
+        A pooled connection that was closed by the server is replaced and the request is sent again.
+        PlexApiError is raised for error responses
+        '''
+        if timeout is None:
+            timeout = self.timeout
+        url = path
+        if params:
+            url = path + '?' + encodeParams(params)
+
+        if not self.circuitBreaker.allowRequest():
+            raise PlexApiUnavailableError(method, path, self.circuitBreaker.getRetryTime())
+
+        startTime = time.time()
+        failed = True
+        # whether the server failed - the circuit breaker only counts failures to respond and server errors
+        serverFailed = True
+        try:
+            while True:
+                connection, reused = self.acquireConnection(timeout)
+                try:
+                    connection.request(method, url, body, headers or {})
+                    response = connection.getresponse()
+                except socket.timeout:
+                    connection.close()
+                    raise
+                except (httplib.HTTPException, socket.error) as e:
+                    connection.close()
+                    # the server may have closed an idle keep-alive connection - retry with a new connection
+                    if reused:
+                        logDebug('request', 'pooled connection failed - retrying with a new connection : %s', e)
+                        continue
+                    raise
+
+                try:
+                    if response.status >= 400 or responseHandler is None:
+                        result = response.read()
+                        reusable = True
+                    else:
+                        result = responseHandler(response)
+                        reusable = self.drainResponse(response)
+                except Exception:
+                    connection.close()
+                    raise
+
+                if response.will_close or not reusable:
+                    connection.close()
+                else:
+                    self.releaseConnection(connection)
+                if response.status >= 400:
+                    error = PlexApiError(method, path, response.status, response.reason)
+                    serverFailed = error.isServerError()
+                    raise error
+                failed = False
+                serverFailed = False
+                return result
+        finally:
+            self.recordRequest(time.time() - startTime, failed)
+            if serverFailed:
+                self.circuitBreaker.recordFailure()
+            else:
+                self.circuitBreaker.recordSuccess()
+
+    def getStatistics(self):
+        with self.lock:
+            averageLatency = 0.0
+            if self.requests > 0:
+                averageLatency = self.totalLatency / self.requests
+            return {'requests': self.requests, 'errors': self.errors, 'connectionsOpened': self.connectionsOpened,
+                    'averageLatency': round(averageLatency, 4), 'maxLatency': round(self.maxLatency, 4)}
+
+PLEX_HTTP_CLIENT = PlexHttpClient(PLEX_API_HOST, PLEX_API_PORT, PLEX_API_TIMEOUT, PLEX_API_MAX_IDLE_CONNECTIONS, PLEX_API_CIRCUIT_BREAKER)
+
+class ExpiringCache(LruCache):
+    '''
+        LRU cache whose entries expire maxAge seconds after they were added
+    '''
+
+    def __init__(self, maxEntries, maxAge):
+        LruCache.__init__(self, maxEntries)
+        self.maxAge = maxAge
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = LruCache.get(self, key)
+            if entry is None:
+                return default
+            expiresAt, value = entry
+            if time.time() >= expiresAt:
+                del self.entries[key]
+                self.hits = self.hits - 1
+                self.misses = self.misses + 1
+                return default
+            return value
+
+    def put(self, key, value):
+        LruCache.put(self, key, (time.time() + self.maxAge, value))
+
+LIBRARY_SECTION_CACHE = ExpiringCache(LIBRARY_SECTION_CACHE_MAX_ENTRIES, LIBRARY_SECTION_CACHE_MAX_AGE)
+
+def getLibrarySectionId(metadataId):
+    '''
+    Gets the id of the library section that contains the show or season with the specified metadata id.
+    The id is read from the metadata XML once and cached
+    '''
+    librarySectionId = LIBRARY_SECTION_CACHE.get(str(metadataId))
+    if librarySectionId is not None:
+        logDebug('getLibrarySectionId', 'using cached librarySectionId %s for metadata id %s', librarySectionId, metadataId)
+        return librarySectionId
+
+    # Get the library section id from the XML metadata
+    metadataPath = '/library/metadata/'+str(metadataId)
+    logDebug('getLibrarySectionId','metadata path: %s', metadataPath)
+    attributes = PLEX_HTTP_CLIENT.request('GET', metadataPath, [('includeExtras', '1'), ('X-Plex-Token', getPlexToken())], timeout=getPlexApiTimeout(),
+                                          responseHandler=lambda response: readXmlAttributes(response, ['MediaContainer']))
+    librarySectionId = attributes['MediaContainer']['librarySectionID']
+    logDebug('getLibrarySectionId','librarySectionId: %s', librarySectionId)
+
+    LIBRARY_SECTION_CACHE.put(str(metadataId), librarySectionId)
+    return librarySectionId
+
+def hashSeasonValues(title, summary):
+    '''
+    Hashes the season title and summary
+    '''
+    values = []
+    for value in [title, summary]:
+        if value is None:
+            value = ''
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        values.append(value)
+    return hashlib.md5('\0'.join(values)).hexdigest()
+
+def getSeasonValues(seasonId, elementName='Directory'):
+    '''
+    Gets the current season title and summary from the Plex Media Server - the values of an episode are read
+    from the Video element
+    '''
+    attributes = PLEX_HTTP_CLIENT.request('GET', '/library/metadata/'+str(seasonId), [('X-Plex-Token', getPlexToken())], timeout=getPlexApiTimeout(),
+                                          responseHandler=lambda response: readXmlAttributes(response, [elementName]))
+    directory = attributes.get(elementName)
+    if directory is None:
+        return None, None
+    return directory.get('title', ''), directory.get('summary', '')
+
+class SeasonWriteTracker(object):
+    '''
+        Remembers a hash of the title and summary that were last sent to Plex for each season so that
+        unchanged seasons are not written again. The hashes are persisted in the plugin's data storage.
+        Seasons that are not known yet are compared against the values currently stored by the server
+    '''
+
+    def __init__(self, name):
+        self.name = name
+        self.hashes = None
+        self.changed = False
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.skipped = 0
+
+    def load(self):
+        if self.hashes is None:
+            hashes = loadDataObject(self.name, {})
+            if not isinstance(hashes, dict):
+                log('load', 'stored season hashes %s are not valid - starting with no hashes', self.name)
+                hashes = {}
+            self.hashes = hashes
+
+    def isChanged(self, seasonId, title, summary, elementName='Directory'):
+        '''
+        Tests whether the title or summary differ from the values Plex has for the season. The title is not
+        compared when it is None
+        '''
+        valuesHash = hashSeasonValues(title, summary)
+        with self.lock:
+            self.load()
+            if self.hashes.get(str(seasonId)) == valuesHash:
+                self.skipped = self.skipped + 1
+                return False
+
+        # the season is not known or changed since the last write - compare with the server
+        currentTitle, currentSummary = getSeasonValues(seasonId, elementName)
+        if title is None:
+            currentTitle = None
+        if hashSeasonValues(currentTitle, currentSummary) == valuesHash:
+            self.remember(seasonId, title, summary, False)
+            with self.lock:
+                self.skipped = self.skipped + 1
+            return False
+        return True
+
+    def remember(self, seasonId, title, summary, sent=True):
+        '''
+        Remembers the title and summary that Plex has for the season
+        '''
+        with self.lock:
+            self.load()
+            self.hashes[str(seasonId)] = hashSeasonValues(title, summary)
+            self.changed = True
+            if sent:
+                self.sent = self.sent + 1
+
+    def save(self):
+        with self.lock:
+            if not self.changed:
+                return
+            hashes = dict(self.hashes)
+            self.changed = False
+        saveDataObject(self.name, hashes)
+
+    def getStatistics(self):
+        with self.lock:
+            return {'sent': self.sent, 'skipped': self.skipped}
+
+SEASON_WRITE_TRACKER = SeasonWriteTracker(SEASON_WRITE_TRACKER_NAME)
+
 def setSeasonMetadata(seasonDataMap):
     '''
-    Calls the web API to set the season title and summary
+    Calls the web API to set the season title and summary. An episode summary is set instead when the type entry
+    of the map is episode - the title is only set when it is not None. The library section id is looked up by the
+    showId entry of the map when there is one - all of the seasons of a show are in the library section
+    of the show so the lookup is cached for the show. The requests are timed
+    into the metrics entry of the map when there is one and into the agent's metrics otherwise
     '''
+    metrics = seasonDataMap.get('metrics') or METRICS
     # if the plex toke is not set - skip
     if(not isPlexTokenSet()):
         log('setSeasonMetadata', 'Plex token is not set - skipping season title and summary update')
         return
     
+    # skip the write if Plex already has the title and summary
+    startTime = time.time()
+    plexType, elementName = PLEX_METADATA_TYPES[seasonDataMap.get('type') or 'season']
+    changed = SEASON_WRITE_TRACKER.isChanged(seasonDataMap['id'], seasonDataMap['title'], seasonDataMap['summary'], elementName)
+    metrics.addTime('plexApi.seasonCheck', time.time() - startTime)
+    if not changed:
+        log('setSeasonMetadata', 'season %s title and summary did not change - skipping season title and summary update', seasonDataMap['id'])
+        metrics.count('seasons.unchanged')
+        return
+
     log('setSeasonMetadata', 'Plex token is set - updating season title and summary update')
     plexToken = getPlexToken()
-    #Get the library section id from the XML metadata
-    metadataCheckUrl = 'http://127.0.0.1:32400/library/metadata/'+str(seasonDataMap['id'])+'?checkFiles=1&includeExtras=1&X-Plex-Token=' + plexToken
-    logDebug('metadataXml','url: %s', metadataCheckUrl)
-
-    metadataXml = urllib2.urlopen(metadataCheckUrl) 
-    xmldoc = minidom.parse(metadataXml)
-    mediaContainer = xmldoc.getElementsByTagName('MediaContainer')[0]
-    librarySectionId = mediaContainer.attributes['librarySectionID'].value
-    logDebug('setSeasonMetadata','librarySectionId: %s', str(librarySectionId))
+    startTime = time.time()
+    librarySectionId = getLibrarySectionId(seasonDataMap.get('showId') or seasonDataMap['id'])
+    metrics.addTime('plexApi.librarySection', time.time() - startTime)
+    logDebug('setSeasonMetadata','librarySectionId: %s', librarySectionId)
 
     # Call the web API to set the season title and summary
-    data = {'type':'3','id':seasonDataMap['id'],'title.value':seasonDataMap['title'],'summary.value':seasonDataMap['summary'],'summary.locked':'0','X-Plex-Token':plexToken}
-    dataEncoded = urllib.urlencode(data)
-    logDebug('setSeasonMetadata','dataEncoded: %s', dataEncoded)
-    urlStr = 'http://127.0.0.1:32400/library/sections/'+str(librarySectionId)+'/all?' + dataEncoded
-    logDebug('setSeasonMetadata','url: %s', urlStr)
+    data = [('type', plexType), ('id', seasonDataMap['id'])]
+    if seasonDataMap['title'] is not None:
+        data.append(('title.value', seasonDataMap['title']))
+    data = data + [('summary.value', seasonDataMap['summary']), ('summary.locked', '0')]
+    logDebug('setSeasonMetadata','data: %s', data)
+    sectionPath = '/library/sections/'+str(librarySectionId)+'/all'
+    logDebug('setSeasonMetadata','path: %s', sectionPath)
     
-    opener = urllib2.build_opener(urllib2.HTTPHandler)
-    request = urllib2.Request(urlStr,data=urllib.urlencode({'dummy':'dummy'}))
-    request.add_header('Content-Type', 'text/html')
-    request.get_method = lambda: 'PUT'
-    url = opener.open(request)
+    startTime = time.time()
+    PLEX_HTTP_CLIENT.request('PUT', sectionPath, data + [('X-Plex-Token', plexToken)], body=urllib.urlencode({'dummy':'dummy'}), headers={'Content-Type': 'text/html'}, timeout=getPlexApiTimeout())
+    metrics.addTime('plexApi.seasonUpdate', time.time() - startTime)
+    SEASON_WRITE_TRACKER.remember(seasonDataMap['id'], seasonDataMap['title'], seasonDataMap['summary'])
+
+def getSeasonUpdateMaxWorkers():
+    '''
+    Gets the number of season updates to send at the same time from the plugin preferences
+    '''
+    return getPreferences().seasonUpdateMaxWorkers
+
+# values of a season write that are queued and persisted - the type is episode for the episode summaries sent by
+# the sidecar watcher
+SEASON_WRITE_KEYS = ('id', 'title', 'summary', 'showId', 'type')
+
+class SeasonWriteQueue(object):
+    '''
+        Write-behind queue of the season titles and summaries to send to the Plex Media Server, so that an update
+        does not wait for the server. Writes to a season that is already queued replace the queued values. The
+        queued writes are persisted in the plugin's data storage and sent again after a restart.
+        The writes are sent by background flusher threads. A write that fails because the server did not respond
+        or responded with a server error is retried with exponential backoff up to maxAttempts times, other
+        errors drop the write. The flushers wait while the Plex API circuit breaker is open
+    '''
+
+    def __init__(self, name, maxAttempts, retryDelay, maxRetryDelay):
+        self.name = name
+        self.maxAttempts = maxAttempts
+        self.retryDelay = retryDelay
+        self.maxRetryDelay = maxRetryDelay
+        self.condition = threading.Condition()
+        # season id to [values, attempts, time of the next attempt] - the writes in flight are not pending
+        self.pending = None
+        self.inFlight = {}
+        self.workers = []
+        self.changed = False
+        self.queued = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.retried = 0
+        self.dropped = 0
+
+    def load(self):
+        '''
+        Loads the persisted writes - called with the condition held
+        '''
+        if self.pending is not None:
+            return
+        self.pending = OrderedDict()
+        writes = loadDataObject(self.name, [])
+        if not isinstance(writes, list):
+            log('load', 'stored season writes %s are not valid - starting with no writes', self.name)
+            writes = []
+        for values in writes:
+            if isinstance(values, dict) and values.get('id') is not None:
+                self.pending[str(values['id'])] = [values, 0, 0]
+        if self.pending:
+            log('load', 'loaded %s season writes that were not sent', len(self.pending))
+
+    def start(self, maxWorkers):
+        '''
+        Loads the persisted writes and starts the flushers if there are writes to send
+        '''
+        with self.condition:
+            self.load()
+            if self.pending:
+                self.startWorkers(maxWorkers)
+                self.condition.notify_all()
+
+    def startWorkers(self, maxWorkers):
+        while len(self.workers) < maxWorkers:
+            worker = threading.Thread(target=self.work, name='SeasonWriteQueue-%s' % len(self.workers))
+            worker.daemon = True
+            self.workers.append(worker)
+            worker.start()
+
+    def put(self, seasonDataMap, maxWorkers):
+        '''
+        Queues the season write and starts the flushers up to maxWorkers
+        '''
+        values = dict((key, seasonDataMap.get(key)) for key in SEASON_WRITE_KEYS)
+        seasonId = str(values['id'])
+        with self.condition:
+            self.load()
+            write = self.pending.get(seasonId)
+            if write is None:
+                self.pending[seasonId] = [values, 0, 0]
+                self.queued = self.queued + 1
+            else:
+                logDebug('put', 'season %s is already queued - replacing the queued values', seasonId)
+                write[0] = values
+                write[1] = 0
+                write[2] = 0
+                self.coalesced = self.coalesced + 1
+            self.changed = True
+            self.startWorkers(maxWorkers)
+            self.condition.notify()
+
+    def take(self):
+        '''
+        Waits for a write that is due and not in flight and moves it in flight
+        '''
+        with self.condition:
+            while True:
+                self.load()
+                now = time.time()
+                waitUntil = PLEX_HTTP_CLIENT.circuitBreaker.getRetryTime()
+                if waitUntil is None or waitUntil <= now:
+                    waitUntil = None
+                    for seasonId, write in self.pending.items():
+                        if seasonId in self.inFlight:
+                            continue
+                        if write[2] <= now:
+                            del self.pending[seasonId]
+                            self.inFlight[seasonId] = write
+                            return seasonId, write
+                        if waitUntil is None or write[2] < waitUntil:
+                            waitUntil = write[2]
+                if waitUntil is None:
+                    self.condition.wait()
+                else:
+                    self.condition.wait(max(waitUntil - now, 0.01))
+
+    def work(self):
+        while True:
+            seasonId, write = self.take()
+            values, attempts, nextAttempt = write
+            retryTime = None
+            try:
+                setSeasonMetadata(values)
+                with self.condition:
+                    self.sent = self.sent + 1
+            except PlexApiUnavailableError as e:
+                # not sent - try again when the circuit breaker lets requests through
+                logDebug('work', 'season %s not sent : %s', seasonId, e)
+                retryTime = e.retryTime or time.time()
+            except PLEX_API_ERRORS as e:
+                if isinstance(e, PlexApiError) and not e.isServerError():
+                    log('work', 'unable to update season %s - dropping the update : %s', seasonId, e)
+                    self.drop()
+                else:
+                    attempts = attempts + 1
+                    if attempts >= self.maxAttempts:
+                        log('work', 'unable to update season %s after %s attempts - dropping the update : %s', seasonId, attempts, e)
+                        self.drop()
+                    else:
+                        delay = min(self.retryDelay * 2 ** (attempts - 1), self.maxRetryDelay)
+                        log('work', 'unable to update season %s - retrying in %s seconds : %s', seasonId, delay, e)
+                        retryTime = time.time() + delay
+            except Exception as e:
+                log('work', 'unable to update season %s - dropping the update : %s', seasonId, e)
+                self.drop()
+
+            with self.condition:
+                del self.inFlight[seasonId]
+                # a write that was queued for the season in the meantime replaces the one that failed
+                if retryTime is not None and seasonId not in self.pending:
+                    self.pending[seasonId] = [values, attempts, retryTime]
+                    if attempts > write[1]:
+                        self.retried = self.retried + 1
+                self.changed = True
+                drained = not self.pending and not self.inFlight
+                self.condition.notify_all()
+            if drained:
+                self.save()
+                SEASON_WRITE_TRACKER.save()
+
+    def drop(self):
+        with self.condition:
+            self.dropped = self.dropped + 1
+
+    def flush(self, timeout=None):
+        '''
+        Waits until all of the queued writes were sent or dropped. Returns False if writes are still queued
+        after timeout seconds
+        '''
+        endTime = None
+        if timeout is not None:
+            endTime = time.time() + timeout
+        with self.condition:
+            self.load()
+            while self.pending or self.inFlight:
+                if endTime is None:
+                    self.condition.wait()
+                else:
+                    remaining = endTime - time.time()
+                    if remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+            return True
+
+    def save(self):
+        '''
+        Persists the writes that were not sent yet, including the ones in flight
+        '''
+        with self.condition:
+            if not self.changed or self.pending is None:
+                return
+            writes = [write[0] for write in self.inFlight.values()] + [write[0] for write in self.pending.values()]
+            self.changed = False
+        saveDataObject(self.name, writes)
+
+    def getStatistics(self):
+        with self.condition:
+            pending = 0
+            if self.pending is not None:
+                pending = len(self.pending)
+            return {'pending': pending, 'inFlight': len(self.inFlight), 'queued': self.queued, 'coalesced': self.coalesced,
+                    'sent': self.sent, 'retried': self.retried, 'dropped': self.dropped}
+
+SEASON_WRITE_QUEUE = SeasonWriteQueue(SEASON_WRITE_QUEUE_NAME, SEASON_WRITE_QUEUE_MAX_ATTEMPTS, SEASON_WRITE_QUEUE_RETRY_DELAY,
+                                      SEASON_WRITE_QUEUE_MAX_RETRY_DELAY)
+
+def getFileState(filePath, directoryIndex=None):
+    '''
+    Gets the size and modified time of the file - None is returned if the file does not exist
+    '''
+    fileStat = statFile(filePath, directoryIndex)
+    if fileStat is None:
+        return None
+    return (fileStat.st_size, fileStat.st_mtime)
+
+def getWatchPath(filePath):
+    return os.path.normpath(os.path.normcase(filePath))
+
+class SidecarWatcher(object):
+    '''
+        Watches the episode and season summary files of the updated shows and sends a changed summary to Plex as
+        a single episode or season write through the season write queue, so that editing a summary file does not
+        need a refresh of the whole show. The directories of the summary files are watched with inotify where it
+        is available, otherwise the files are polled every pollInterval seconds. Every update of a show replaces
+        the watched files of the show. Changes to the show summary and metadata files still need a refresh
+    '''
+
+    def __init__(self, pollInterval, settleTime, maxDirectories):
+        self.pollInterval = pollInterval
+        self.settleTime = settleTime
+        self.maxDirectories = maxDirectories
+        self.lock = threading.Lock()
+        # show id to the (target, file paths) of the show
+        self.shows = {}
+        # file path to the targets the file is a summary file of
+        self.paths = {}
+        # file path to the size and modified time of the file when it was last seen - None if it did not exist
+        self.fileStates = {}
+        self.thread = None
+        self.polling = LIBC is None
+        self.inotifyFd = None
+        # inotify watch descriptor to the watched directory
+        self.watchDescriptors = {}
+        self.directories = set()
+        self.events = 0
+        self.changes = 0
+        self.episodeWrites = 0
+        self.seasonWrites = 0
+
+    def watchShow(self, showId, targets, directoryIndex=None):
+        '''
+        Replaces the watched summary files of the show. The targets are tuples of the episode or season and the
+        paths of its summary files - ('episode', episode id, show id) or ('season', season id, show id, title,
+        season directories, summary file names). The current state of the files is read through the directory index
+        '''
+        targets = [(target, tuple(getWatchPath(filePath) for filePath in filePaths)) for target, filePaths in targets]
+        fileStates = {}
+        for target, filePaths in targets:
+            for filePath in filePaths:
+                if filePath not in fileStates:
+                    fileStates[filePath] = getFileState(filePath, directoryIndex)
+        with self.lock:
+            for target, filePaths in self.shows.pop(showId, []):
+                for filePath in filePaths:
+                    pathTargets = self.paths.get(filePath)
+                    if pathTargets is not None:
+                        pathTargets.discard(target)
+                        if not pathTargets:
+                            del self.paths[filePath]
+                            del self.fileStates[filePath]
+            self.shows[showId] = targets
+            for target, filePaths in targets:
+                for filePath in filePaths:
+                    self.paths.setdefault(filePath, set()).add(target)
+                    self.fileStates[filePath] = fileStates[filePath]
+            self.start()
+            if not self.polling:
+                for filePath in fileStates:
+                    self.watchDirectory(os.path.dirname(filePath))
+
+    def start(self):
+        '''
+        Starts the watcher thread - called with the lock held
+        '''
+        if self.thread is not None:
+            return
+        if not self.polling:
+            self.inotifyFd = LIBC.inotify_init1(INOTIFY_NONBLOCK | INOTIFY_CLOEXEC)
+            if self.inotifyFd < 0:
+                log('start', 'unable to use inotify - polling the summary files : %s', os.strerror(ctypes.get_errno()))
+                self.inotifyFd = None
+                self.polling = True
+        self.thread = threading.Thread(target=self.run, name='SidecarWatcher')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def watchDirectory(self, dirPath):
+        '''
+        Adds an inotify watch for the directory - the watcher switches to polling when the directory cannot be
+        watched. Called with the lock held
+        '''
+        if dirPath in self.directories:
+            return
+        if len(self.directories) >= self.maxDirectories:
+            log('watchDirectory', 'more than %s directories to watch - polling the summary files', self.maxDirectories)
+            self.polling = True
+            return
+        encodedPath = dirPath
+        if isinstance(encodedPath, unicode):
+            encodedPath = encodedPath.encode(sys.getfilesystemencoding() or 'utf-8')
+        watchDescriptor = LIBC.inotify_add_watch(self.inotifyFd, encodedPath, INOTIFY_WATCH_MASK)
+        if watchDescriptor < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOENT:
+                logDebug('watchDirectory', 'directory %s does not exist', dirPath)
+                return
+            log('watchDirectory', 'unable to watch directory %s - polling the summary files : %s', dirPath, os.strerror(error))
+            self.polling = True
+            return
+        self.watchDescriptors[watchDescriptor] = dirPath
+        self.directories.add(dirPath)
+
+    def run(self):
+        while True:
+            if self.polling:
+                self.closeInotify()
+                time.sleep(self.pollInterval)
+                with self.lock:
+                    filePaths = list(self.paths)
+            else:
+                filePaths = self.readEvents()
+            if not getPreferences().watchEnabled:
+                self.stop()
+                return
+            if filePaths:
+                try:
+                    self.sendChanges(filePaths)
+                except Exception as e:
+                    log('run', 'unable to send the changed summaries : %s', e)
+
+    def readEvents(self):
+        '''
+        Waits up to pollInterval seconds for inotify events and returns the paths of the files that changed. The
+        events are read until there are no more events for settleTime seconds - editors often write a file in
+        several steps
+        '''
+        filePaths = set()
+        overflow = False
+        endTime = time.time() + self.pollInterval
+        timeout = self.pollInterval
+        while select.select([self.inotifyFd], [], [], timeout)[0]:
+            try:
+                data = os.read(self.inotifyFd, 64 * 1024)
+            except OSError as e:
+                if e.errno != errno.EAGAIN:
+                    raise
+                data = b''
+            offset = 0
+            while offset + INOTIFY_EVENT_SIZE <= len(data):
+                watchDescriptor, mask, cookie, length = struct.unpack_from(INOTIFY_EVENT_FORMAT, data, offset)
+                name = data[offset + INOTIFY_EVENT_SIZE:offset + INOTIFY_EVENT_SIZE + length].rstrip(b'\0')
+                offset = offset + INOTIFY_EVENT_SIZE + length
+                self.events = self.events + 1
+                if mask & INOTIFY_QUEUE_OVERFLOW:
+                    overflow = True
+                dirPath = self.watchDescriptors.get(watchDescriptor)
+                if dirPath is not None and name:
+                    filePaths.add(getWatchPath(os.path.join(dirPath, name.decode(sys.getfilesystemencoding() or 'utf-8', 'replace'))))
+            if time.time() >= endTime:
+                break
+            timeout = self.settleTime
+        # events were lost - check all of the files
+        if overflow:
+            log('readEvents', 'inotify events were lost - checking all of the summary files')
+            with self.lock:
+                return list(self.paths)
+        return filePaths
+
+    def sendChanges(self, filePaths):
+        '''
+        Sends the summaries of the episodes and seasons whose summary files changed since they were last seen
+        '''
+        changedTargets = OrderedDict()
+        with self.lock:
+            for filePath in filePaths:
+                pathTargets = self.paths.get(filePath)
+                if not pathTargets:
+                    continue
+                fileState = getFileState(filePath)
+                if fileState == self.fileStates.get(filePath):
+                    continue
+                self.fileStates[filePath] = fileState
+                self.changes = self.changes + 1
+                for target in pathTargets:
+                    changedTargets[target] = filePath
+
+        for target, filePath in changedTargets.items():
+            if target[0] == 'episode':
+                kind, episodeId, showId = target
+                episodeSummary = loadTextFromFile(filePath)
+                if episodeSummary is None:
+                    log('sendChanges', 'summary file %s of episode %s was removed - refresh the show to clear the summary', filePath, episodeId)
+                    continue
+                log('sendChanges', 'summary file %s of episode %s changed - sending the summary', filePath, episodeId)
+                SEASON_WRITE_QUEUE.put({'type': 'episode', 'id': episodeId, 'title': None, 'summary': episodeSummary, 'showId': showId},
+                                       getSeasonUpdateMaxWorkers())
+                with self.lock:
+                    self.episodeWrites = self.episodeWrites + 1
+            else:
+                kind, seasonId, showId, seasonTitle, seasonDirectories, seasonFileNames = target
+                # the season summary is looked up like update does - another summary file may take priority
+                seasonSummary = findSeasonSummary(list(seasonDirectories), list(seasonFileNames))
+                log('sendChanges', 'summary file %s of season %s changed - sending the season title and summary', filePath, seasonId)
+                SEASON_WRITE_QUEUE.put({'id': seasonId, 'title': seasonTitle, 'summary': seasonSummary or '', 'showId': showId},
+                                       getSeasonUpdateMaxWorkers())
+                with self.lock:
+                    self.seasonWrites = self.seasonWrites + 1
+        if changedTargets:
+            SEASON_WRITE_QUEUE.save()
+
+    def closeInotify(self):
+        with self.lock:
+            if self.inotifyFd is not None:
+                os.close(self.inotifyFd)
+                self.inotifyFd = None
+                self.watchDescriptors.clear()
+                self.directories.clear()
+
+    def stop(self):
+        '''
+        Forgets the watched files and ends the watcher thread - called by the watcher thread when watching was
+        disabled in the plugin preferences
+        '''
+        log('stop', 'summary file watching is disabled - no longer watching the summary files')
+        self.closeInotify()
+        with self.lock:
+            self.shows.clear()
+            self.paths.clear()
+            self.fileStates.clear()
+            self.polling = LIBC is None
+            self.thread = None
+
+    def getStatistics(self):
+        with self.lock:
+            mode = 'inotify'
+            if self.polling:
+                mode = 'polling'
+            return {'mode': mode, 'shows': len(self.shows), 'files': len(self.paths), 'directories': len(self.directories),
+                    'events': self.events, 'changes': self.changes, 'episodeWrites': self.episodeWrites, 'seasonWrites': self.seasonWrites}
+
+SIDECAR_WATCHER = SidecarWatcher(SIDECAR_WATCH_POLL_INTERVAL, SIDECAR_WATCH_SETTLE_TIME, SIDECAR_WATCH_MAX_DIRECTORIES)
+
+class MediaParseResult(object):
+    '''
+        Immutable values parsed from a media file path
+    '''
+    __slots__ = ('seasonNumber', 'seasonTitle', 'episodeTitle', 'summaryFilePath', 'episodeReleaseDate')
+
+    def __init__(self, seasonNumber=None, seasonTitle=None, episodeTitle=None, summaryFilePath=None, episodeReleaseDate=None):
+        object.__setattr__(self, 'seasonNumber', seasonNumber)
+        object.__setattr__(self, 'seasonTitle', seasonTitle)
+        object.__setattr__(self, 'episodeTitle', episodeTitle)
+        object.__setattr__(self, 'summaryFilePath', summaryFilePath)
+        object.__setattr__(self, 'episodeReleaseDate', episodeReleaseDate)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('MediaParseResult is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('MediaParseResult is immutable')
+
+    def __repr__(self):
+        return 'MediaParseResult(seasonNumber=%r, seasonTitle=%r, episodeTitle=%r, summaryFilePath=%r, episodeReleaseDate=%r)' % (
+            self.seasonNumber, self.seasonTitle, self.episodeTitle, self.summaryFilePath, self.episodeReleaseDate)
+
+def isLegacyScrubString(scrubString):
+    '''
+    Tests whether the scrub string uses the single character A=B,C=D format i.e. has an equals sign after every
+    character to scrub and a comma after every replacement character
+    '''
+    for i in range(1, len(scrubString), 4):
+        if scrubString[i] != '=':
+            return False
+    for i in range(3, len(scrubString), 4):
+        if scrubString[i] != ',':
+            return False
+    return True
+
+def parseScrubRules(scrubString):
+    '''
+    Parses the scrub string into a list of (value, replacement) pairs in the order they are applied. Single character
+    rules are read at fixed offsets so that commas and equals signs can be used as replacements, otherwise the
+    string is split on commas and each value is separated from its replacement by the first equals sign
+    '''
+    rules = []
+    if isLegacyScrubString(scrubString):
+        i = 0
+        while i + 3 <= len(scrubString):
+            rules.append((scrubString[i], scrubString[i+2]))
+            i = i + 4
+        if i < len(scrubString):
+            logDebug('parseScrubRules', 'did not process the remaining characters [%s] in the string - verify the scrub string is formatted correctly i.e. A=B,C=D', scrubString[i:])
+        return rules
+
+    for rule in scrubString.split(','):
+        value, separator, replacement = rule.partition('=')
+        if not value or not separator:
+            logDebug('parseScrubRules', 'ignoring scrub rule [%s] - verify the scrub string is formatted correctly i.e. A=B,C=D', rule)
+            continue
+        rules.append((value, replacement))
+    return rules
+
+class ScrubRules(object):
+    '''
+        Episode title scrub rules compiled from the scrub string. The rules are applied one after the other - when
+        every value to scrub is a single character the rules are composed into a translate table so a title is
+        scrubbed in a single pass, otherwise each rule is applied with a string replace
+    '''
+
+    def __init__(self, scrubString):
+        self.rules = parseScrubRules(scrubString)
+        self.byteTable = None
+        self.unicodeTable = None
+
+        if not all(len(value) == 1 for value, replacement in self.rules):
+            return
+
+        # compose the rules - a later rule also applies to the replacements of the earlier rules
+        translations = {}
+        for value, replacement in self.rules:
+            for char in translations:
+                translations[char] = translations[char].replace(value, replacement)
+            if value not in translations:
+                translations[value] = replacement
+
+        if all(ord(char) < 128 and len(translation) == 1 and ord(translation) < 128 for char, translation in translations.items()):
+            byteTable = [chr(i) for i in range(256)]
+            for char, translation in translations.items():
+                byteTable[ord(char)] = str(translation)
+            self.byteTable = ''.join(byteTable)
+        if all(ord(char) < 128 and all(ord(c) < 128 for c in translation) for char, translation in translations.items()):
+            self.unicodeTable = dict((ord(char), unicode(translation)) for char, translation in translations.items())
+
+    def apply(self, string):
+        if isinstance(string, unicode):
+            if self.unicodeTable is not None:
+                return string.translate(self.unicodeTable)
+        elif self.byteTable is not None:
+            return string.translate(self.byteTable)
+        for value, replacement in self.rules:
+            string = string.replace(value, replacement)
+        return string
+
+SCRUB_RULES_CACHE = LruCache(SCRUB_RULES_CACHE_MAX_ENTRIES)
+
+def getScrubRules(scrubString):
+    '''
+    Gets the compiled scrub rules of the scrub string - the rules are compiled once per distinct scrub string
+    '''
+    scrubRules = SCRUB_RULES_CACHE.get(scrubString)
+    if scrubRules is None:
+        scrubRules = ScrubRules(scrubString)
+        SCRUB_RULES_CACHE.put(scrubString, scrubRules)
+    return scrubRules
+
+def readPreferenceValues():
+    '''
+    Reads the raw values of the plugin preferences in the order of PREFERENCE_IDS
+    '''
+    return tuple(Prefs[prefId] for prefId in PREFERENCE_IDS)
+
+class PluginPreferences(object):
+    '''
+        Immutable snapshot of the plugin preferences with the values converted to their types and the derived
+        values, such as the file extensions and the compiled scrub rules, computed once
+    '''
+
+    def __init__(self, values):
+        prefs = dict(zip(PREFERENCE_IDS, values))
+        self.set('values', values)
+        self.set('hash', hashlib.md5(repr(values)).hexdigest())
+        self.set('debugEnabled', bool(prefs['logger.debug.enabled']))
+        self.set('useLastModifiedTimestamp', bool(prefs['episode.use.last.modified.timestamp.enabled']))
+        self.set('useCreatedTimestamp', bool(prefs['episode.use.created.timestamp.enabled']))
+        self.set('scrubEnabled', bool(prefs['episode.title.scrub.enabled']))
+        self.set('scrubCharacters', prefs['episode.title.scrub.characters'])
+        scrubRules = None
+        if self.scrubEnabled and isNotBlank(self.scrubCharacters):
+            scrubRules = getScrubRules(self.scrubCharacters)
+        self.set('scrubRules', scrubRules)
+        self.set('summaryFileExtension', '.' + self.getValueOrDefault(prefs['summary.file.extension'], 'summary'))
+        self.set('useShowMetadata', bool(prefs['use.show.metadata.enabled']))
+        self.set('metadataFileExtension', '.' + self.getValueOrDefault(prefs['metadata.file.extension'], 'metadata'))
+        self.set('addTimeToTitle', bool(prefs['episode.add.time.to.title.enabled']))
+        self.set('episodeTimeFormatType', prefs['episode.add.time.to.title.format'])
+        self.set('episodeTimeFormat', EPISODE_TIME_FORMATS.get(self.episodeTimeFormatType))
+        self.set('plexApiTimeout', self.getPositiveNumber(prefs['plex.api.timeout'], float, PLEX_API_TIMEOUT))
+        self.set('seasonUpdateMaxWorkers', self.getPositiveNumber(prefs['plex.api.max.concurrent.requests'], int, SEASON_UPDATE_MAX_WORKERS))
+        self.set('parseCacheMaxEntries', self.getPositiveNumber(prefs['parse.cache.max.entries'], int, PARSE_RESULT_CACHE_MAX_ENTRIES))
+        # seconds an episode may take before it is listed as slow - None when slow episodes are not listed
+        slowEpisodeThreshold = self.getPositiveNumber(prefs['metrics.slow.episode.threshold'], float, None)
+        if slowEpisodeThreshold is not None:
+            slowEpisodeThreshold = slowEpisodeThreshold / 1000
+        self.set('slowEpisodeThreshold', slowEpisodeThreshold)
+        # the preference is in kilobytes
+        summaryFileMaxSize = self.getPositiveNumber(prefs['summary.file.max.size'], float, None)
+        if summaryFileMaxSize is None:
+            self.set('summaryFileMaxSize', SUMMARY_FILE_MAX_SIZE)
+        else:
+            self.set('summaryFileMaxSize', int(summaryFileMaxSize * 1024))
+        self.set('watchEnabled', bool(prefs['summary.watch.enabled']))
+
+    def set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PluginPreferences is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('PluginPreferences is immutable')
+
+    def getValueOrDefault(self, value, default):
+        if isBlank(value):
+            return default
+        return value
+
+    def getPositiveNumber(self, value, numberType, default):
+        try:
+            number = numberType(value)
+        except (TypeError, ValueError):
+            return default
+        if number <= 0:
+            return default
+        return number
+
+# values parsed from the media file paths by (path, preferences hash) - cleared when the preferences change
+PARSE_RESULT_CACHE = LruCache(PARSE_RESULT_CACHE_MAX_ENTRIES)
+
+PREFERENCES = None
+PREFERENCES_LOCK = threading.Lock()
+
+def getPreferences():
+    '''
+    Gets the current snapshot of the plugin preferences - the snapshot is taken on first use and replaced when
+    refreshPreferences() finds the preferences changed
+    '''
+    prefs = PREFERENCES
+    if prefs is None:
+        prefs = refreshPreferences()
+    return prefs
+
+def refreshPreferences():
+    '''
+    Takes a new snapshot of the plugin preferences if they changed since the last snapshot was taken - called at the
+    start of every agent call. Returns the current snapshot
+    '''
+    global PREFERENCES
+    values = readPreferenceValues()
+    with PREFERENCES_LOCK:
+        prefs = PREFERENCES
+        changed = prefs is None or prefs.values != values
+        if changed:
+            prefs = PluginPreferences(values)
+            PREFERENCES = prefs
+    DEBUG_LOGGER.refresh()
+    if changed:
+        logDebug('refreshPreferences', 'preferences changed - new preferences %s', dict(zip(PREFERENCE_IDS, values)))
+        # the cached parse results were parsed with the previous preferences
+        PARSE_RESULT_CACHE.clear(prefs.parseCacheMaxEntries)
+    return prefs
+
+def invalidatePreferences():
+    '''
+    Discards the snapshot of the plugin preferences so the next agent call takes a new snapshot
+    '''
+    global PREFERENCES
+    with PREFERENCES_LOCK:
+        PREFERENCES = None
 
 class BaseMediaParser(object):
     '''
-        Parses the file name and determines the type of tile that was found
+        Parses the file name and determines the type of tile that was found.
+        Parsers do not keep any state between files - parseFile and createResult return a MediaParseResult
+        so a single parser instance can be shared between threads. The parse and parseMatch methods are kept
+        for compatibility - they return the result and also store it for the get* methods, so a caller that
+        uses the getters needs its own parser instance.
     '''
 
-    fileNameRegex = r'^(?P<fileWithoutExt>.*)\..+$'
+    fileNameRegex = FILE_NAME_REGEX
 
     # Episode name REGEX
     partRegexes = [
-                    r'(?P<episodeTitle>.+)(\.[ ]*|-[ ]*)(part[0-9]+|pt[0-9]+)',
-                    r'(?P<episodeTitle>.+)([ ]+)(part[0-9]+|pt[0-9]+)'
+                    re.compile(r'(?P<episodeTitle>.+)(\.[ ]*|-[ ]*)(part[0-9]+|pt[0-9]+)'),
+                    re.compile(r'(?P<episodeTitle>.+)([ ]+)(part[0-9]+|pt[0-9]+)')
                     ]
 
     def __init__(self):
-        self.seasonNumber = None
-        self.seasonTitle = None
-        self.episodeTitle = None
-        self.episodeSummary = None
-        self.episodeReleaseDate = None
+        self.result = None
 
     def stripPart(self, episodeTitle):
         processed = episodeTitle
         # Test whether it contains part
         for partRegex in self.partRegexes:
-            match = re.search(partRegex, processed)
+            match = partRegex.search(processed)
             if match:
                 logDebug('stripPart', 'episode title %s contains part', processed)
                 processed = match.group('episodeTitle').strip()
@@ -263,118 +2286,176 @@ class BaseMediaParser(object):
         return processed
        
     def scrub(self, string, charsToRemove):
-        processed = string
-        stringAsList = list(charsToRemove)
-        i = 0
-        while i + 3 <= len(stringAsList):
-            processed = re.sub(re.escape(stringAsList[i]), stringAsList[i+2], processed)
-            i = i + 4
-        if i < len(stringAsList):
-            logDebug('scrubString', 'did not process the remaining characters [%s] in the string - verify the scrub string is formatted correctly i.e. A=B,C=D', charsToRemove[i:len(charsToRemove)])
+        processed = getScrubRules(charsToRemove).apply(string)
         logDebug('scrubString', 'original: [%s] scrubbed: [%s]', string, processed)
         return processed
 
-    def setValues(self, match):
+    def getValues(self, mediaFile, match):
+        '''
+        Gets the values for the media file from the match as a dictionary of MediaParseResult fields
+        '''
+        return self.getFileValues(mediaFile, self.getPathValues(mediaFile, match))
+
+    def getPathValues(self, mediaFile, match):
+        '''
+        Gets the values that only depend on the media file path and the preferences - the result can be cached
+        '''
+        values = {}
+        groups = match.groupdict()
+
         # set the season number
-        self.seasonNumber = None
-        if 'seasonNumber' in match.groupdict() and match.group('seasonNumber') is not None:
-            self.seasonNumber = match.group('seasonNumber').strip()
+        seasonNumber = None
+        if groups.get('seasonNumber') is not None:
+            seasonNumber = groups['seasonNumber'].strip()
 
         # set the season title
-        if 'seasonTitle' in match.groupdict() and match.group('seasonTitle') is not None:
-            self.seasonTitle = self.stripPart(match.group('seasonTitle').strip())
-            logDebug('setValues', 'season title: %s', str(self.seasonTitle))
+        if groups.get('seasonTitle') is not None:
+            values['seasonTitle'] = self.stripPart(groups['seasonTitle'].strip())
+            logDebug('getValues', 'season title: %s', values['seasonTitle'])
     
         # set the episode title
-        self.episodeTitle = self.stripPart(match.group('episodeTitle').strip())
+        episodeTitle = self.stripPart(groups['episodeTitle'].strip())
         # check to see if title should be scrubbed
-        if bool(Prefs['episode.title.scrub.enabled']):
-            episodeScrubChars = Prefs['episode.title.scrub.characters']
-            if isNotBlank(episodeScrubChars):
-                logDebug('setValues', 'scrubbing enabled - using scrub characters [%s] ', episodeScrubChars)
-                self.episodeTitle = self.scrub(self.episodeTitle, episodeScrubChars)
+        prefs = getPreferences()
+        if prefs.scrubEnabled:
+            if prefs.scrubRules is not None:
+                logDebug('getValues', 'scrubbing enabled - using scrub characters [%s] ', prefs.scrubCharacters)
+                episodeTitle = prefs.scrubRules.apply(episodeTitle)
+                logDebug('getValues', 'scrubbed episode title: [%s]', episodeTitle)
             else:
-                logDebug('setValues', 'scrubbing enabled - scrub characters are blank [%s] - skipping scrubbing', episodeScrubChars)
+                logDebug('getValues', 'scrubbing enabled - scrub characters are blank [%s] - skipping scrubbing', prefs.scrubCharacters)
+        values['episodeTitle'] = episodeTitle
         
         # set the episode release date
         # if episodeMonth and episodeDay is present in the regex then the episode release date is in the file name and will be used
-        if 'episodeMonth' in match.groupdict() and 'episodeDay' in match.groupdict():
-            logDebug('setValues', 'episodeMonth found in the regular expression - extracting release date from the file name')
-            self.episodeYear = None
-            if 'episodeYear' in match.groupdict():
-                self.episodeYear = int(match.group('episodeYear').strip())
+        if 'episodeMonth' in groups and 'episodeDay' in groups:
+            logDebug('getValues', 'episodeMonth found in the regular expression - extracting release date from the file name')
+            episodeYear = None
+            if 'episodeYear' in groups:
+                episodeYear = int(groups['episodeYear'].strip())
             # if the regex did not contain a season number but contains an episode year - use the episode year
-            if self.seasonNumber is None and self.episodeYear is not None:
-                self.seasonNumber = str(self.episodeYear)
+            if seasonNumber is None and episodeYear is not None:
+                seasonNumber = str(episodeYear)
             # if the regex did not contain a year use the season number
-            if self.episodeYear is None and self.seasonNumber is not None and int(self.seasonNumber) >= 1000:
-                self.episodeYear = int(self.seasonNumber)
-            self.episodeMonth = int(match.group('episodeMonth').strip())
-            self.episodeDay = int(match.group('episodeDay').strip())
+            if episodeYear is None and seasonNumber is not None and int(seasonNumber) >= 1000:
+                episodeYear = int(seasonNumber)
+            episodeMonth = int(groups['episodeMonth'].strip())
+            episodeDay = int(groups['episodeDay'].strip())
             # Create the date
-            logDebug('setValues', 'year %s month %s day %s', self.episodeYear, self.episodeMonth, self.episodeDay)
-            self.episodeReleaseDate = datetime.datetime(self.episodeYear, self.episodeMonth, self.episodeDay)
-            logDebug('setValues', 'episode date: %s', str(self.episodeReleaseDate))
+            logDebug('getValues', 'year %s month %s day %s', episodeYear, episodeMonth, episodeDay)
+            values['episodeReleaseDate'] = datetime.datetime(episodeYear, episodeMonth, episodeDay)
+            logDebug('getValues', 'episode date: %s', values['episodeReleaseDate'])
+        values['seasonNumber'] = seasonNumber
+        return values
+
+    def getFileValues(self, mediaFile, pathValues, directoryIndex=None):
+        '''
+        Adds the values that depend on the files on disk to a copy of the path values. The files are stat'ed
+        through the directory index when one is passed
+        '''
+        values = dict(pathValues)
 
         # set the episode summary
         # get the summary file path
-        # find out what file format is being used
-        match = re.search(self.fileNameRegex, self.mediaFile)
-        if match:
-            fileWithoutExt = match.group('fileWithoutExt').strip()
-            logDebug('setValues', 'file name without extension %s', fileWithoutExt)
-            summaryFilePath = fileWithoutExt + getSummaryFileExtension()
-            logDebug('setValues', 'looking for summary file %s', summaryFilePath)
-            # If the summary file exist read in the contents
-            if os.path.exists(summaryFilePath) is True:
-                logDebug('setValues', 'episode summary file %s exists', summaryFilePath)
-                self.episodeSummary = loadTextFromFile(summaryFilePath)
+        summaryFilePath = getEpisodeSummaryFilePath(mediaFile)
+        if summaryFilePath is not None:
+            logDebug('getValues', 'looking for summary file %s', summaryFilePath)
+            # If the summary file exist keep its path so the contents can be read in
+            if statFile(summaryFilePath, directoryIndex) is not None:
+                logDebug('getValues', 'episode summary file %s exists', summaryFilePath)
+                values['summaryFilePath'] = summaryFilePath
             else:
-                logDebug('setValues', 'episode summary file does not exist')
+                logDebug('getValues', 'episode summary file does not exist')
+
+        return values
             
     def getSupportedRegexes(self):
         return []
 
+    def getRequiredTokens(self):
+        '''
+        Gets the names of the PATH_TOKEN_REGEXES that each of the supported regular expressions requires - in the
+        order of the regular expressions. An empty tuple means the regular expression is always searched
+        '''
+        return [() for regex in self.getSupportedRegexes()]
+
+    def getCompiledRegexes(self):
+        '''
+        Gets the supported regular expressions compiled once per parser class
+        '''
+        parserClass = type(self)
+        compiledRegexes = parserClass.__dict__.get('compiledRegexes')
+        if compiledRegexes is None:
+            compiledRegexes = [re.compile(regex, re.IGNORECASE) for regex in self.getSupportedRegexes()]
+            parserClass.compiledRegexes = compiledRegexes
+        return compiledRegexes
+
     def containsMatch(self, mediaFile):
         retVal = False
         # Iterate over the list of regular expressions
-        for regex in self.getSupportedRegexes():
+        for regex in self.getCompiledRegexes():
             # Find out what file format is being used
-            match = re.search(regex, mediaFile, re.IGNORECASE)
+            match = regex.search(mediaFile)
             if match:
                 retVal = True
                 break
 
         return retVal
 
+    def createResult(self, mediaFile, match):
+        '''
+        Creates the parse result for the media file from a match of one of the supported regular expressions
+        '''
+        return MediaParseResult(**self.getValues(mediaFile, match))
 
-    def parse(self, mediaFile):
-        self.mediaFile = mediaFile
-
+    def parseFile(self, mediaFile):
+        '''
+        Parses the media file and returns the result - None is returned if none of the regular expressions match
+        '''
         # Iterate over the list of regular expressions
-        for regex in self.getSupportedRegexes():
+        for regex in self.getCompiledRegexes():
             # Find out what file format is being used
-            match = re.search(regex, mediaFile, re.IGNORECASE)
-            logDebug('parse', 'regex %s - matches: %s', regex, match)
+            match = regex.search(mediaFile)
+            logDebug('parseFile', 'regex %s - matches: %s', regex.pattern, match)
             if match:
-                logDebug('parse', 'found matches')
-                self.setValues(match)
-                break
+                logDebug('parseFile', 'found matches')
+                return self.createResult(mediaFile, match)
+
+        return None
+
+    def parse(self, mediaFile):
+        '''
+        Parses the media file, stores the result for the get* methods and returns it
+        '''
+        self.result = self.parseFile(mediaFile)
+        return self.result
+
+    def parseMatch(self, mediaFile, match):
+        '''
+        Sets the values from a match that was already found for the media file and returns the result
+        '''
+        self.result = self.createResult(mediaFile, match)
+        return self.result
 
     def getSeasonNumber(self):
-        return self.seasonNumber
+        if self.result is not None:
+            return self.result.seasonNumber
 
     def getSeasonTitle(self):
-        return self.seasonTitle
+        if self.result is not None:
+            return self.result.seasonTitle
 
     def getEpisodeTitle(self):
-        return self.episodeTitle
+        if self.result is not None:
+            return self.result.episodeTitle
 
     def getEpisodeSummary(self):
-        return self.episodeSummary
+        if self.result is not None and self.result.summaryFilePath is not None:
+            return loadTextFromFile(self.result.summaryFilePath)
 
     def getEpisodeReleaseDate(self):
-        return self.episodeReleaseDate
+        if self.result is not None:
+            return self.result.episodeReleaseDate
         
 
 class SeriesDateBasedMediaParser(BaseMediaParser):
@@ -415,6 +2496,10 @@ class SeriesDateBasedMediaParser(BaseMediaParser):
                 r'(?P<seasonNumber>[0-9]{4})([-\. ]+(?P<seasonTitle>[^\\/]+)){0,1}[\\/](?P<showTitle>[^\\/]+)[\\/][^\\/]*?(?P<episodeMonth>[0-9]{2})[-\. ](?P<episodeDay>[0-9]{2})(_(?P<episodeIndex>[0-9]+)){0,2}[ ]*[-\.]{0,1}[ ]*(?P<episodeTitle>.*)\.(?P<ext>.+)$'
                 ]
 
+    def getRequiredTokens(self):
+        return [('date',), ('usDate',), ('date', 'yearFolder'), ('date', 'yearFolder'), ('usDate', 'yearFolder'), ('usDate', 'yearFolder'),
+                ('monthDay', 'yearFolder'), ('monthDay', 'yearFolder')]
+
 
 class SeriesDateTimeBasedMediaParser(BaseMediaParser):
     def getSupportedRegexes(self):
@@ -462,40 +2547,43 @@ class SeriesDateTimeBasedMediaParser(BaseMediaParser):
                 r'(?P<seasonNumber>[0-9]{4})([-\. ]+(?P<seasonTitle>[^\\/]+)){0,1}[\\/](?P<showTitle>[^\\/]+)[\\/][^\\/]*?(?P<episodeMonth>[0-9]{2})[-\. ](?P<episodeDay>[0-9]{2})[-\. _](?P<episodeHour>[0-9]{2})[-\. ](?P<episodeMinute>[0-9]{2})[-\. ](?P<episodeSecond>[0-9]{2})[-\. ](?P<episodeAMPM>[AM|PM]{2}){0,1}[ ]*[-\.]{0,1}[ ]*(?P<episodeTitle>.*)\.(?P<ext>.+)$'
                 ]
 
-    def setValues(self, match):
-        # set the common values
-        BaseMediaParser.setValues(self, match)
+    def getRequiredTokens(self):
+        return [('dateTime',), ('usDateTime',), ('dateTime', 'yearFolder'), ('dateTime', 'yearFolder'), ('dateTime', 'yearFolder'),
+                ('usDateTime', 'yearFolder'), ('usDateTime', 'yearFolder'), ('monthDayTime', 'yearFolder'), ('monthDayTime', 'yearFolder')]
+
+    def getPathValues(self, mediaFile, match):
+        # get the common values
+        values = BaseMediaParser.getPathValues(self, mediaFile, match)
 
         # check to see if the "Add time to episode title" preference is enabled
-        if bool(Prefs['episode.add.time.to.title.enabled']):
-            logDebug('setValues', "Add time to episode title is enabled - extracting episode time from the file's name")
-            episodeTimeFormatType = Prefs['episode.add.time.to.title.format']            
-            logDebug('setValues', "Add time to episode title format = %s", episodeTimeFormatType)
+        prefs = getPreferences()
+        if prefs.addTimeToTitle:
+            logDebug('getValues', "Add time to episode title is enabled - extracting episode time from the file's name")
+            logDebug('getValues', "Add time to episode title format = %s", prefs.episodeTimeFormatType)
             
             # parse the hour parts
-            self.episodeHour = int(match.group('episodeHour').strip())
-            self.episodeAMPM = match.group('episodeAMPM')
+            episodeHour = int(match.group('episodeHour').strip())
+            episodeAMPM = match.group('episodeAMPM')
             # if the regex contains PM then add 12 hours to episode
-            if self.episodeAMPM is not None and self.episodeAMPM.lower() == 'pm':
-                log('setValues', 'episode contains PM - adding 12 hours to episode hour %s', self.episodeHour)
-                self.episodeHour = self.episodeHour + 12
-                log('setValues', 'new value = %s', self.episodeHour)            
-            self.episodeMinute = int(match.group('episodeMinute').strip())
-            self.episodeSecond = int(match.group('episodeSecond').strip())
-            log('setValues', 'parse time: hour %s minute %s second %s', self.episodeHour, self.episodeMinute, self.episodeSecond)
-            episodeTime = datetime.time(self.episodeHour, self.episodeMinute, self.episodeSecond)
+            if episodeAMPM is not None and episodeAMPM.lower() == 'pm':
+                log('getValues', 'episode contains PM - adding 12 hours to episode hour %s', episodeHour)
+                episodeHour = episodeHour + 12
+                log('getValues', 'new value = %s', episodeHour)            
+            episodeMinute = int(match.group('episodeMinute').strip())
+            episodeSecond = int(match.group('episodeSecond').strip())
+            log('getValues', 'parse time: hour %s minute %s second %s', episodeHour, episodeMinute, episodeSecond)
+            episodeTime = datetime.time(episodeHour, episodeMinute, episodeSecond)
             # if the format type is 24 hours and regex contains AM/PM then calculate new hour value
             formattedTimeString = None
-            if episodeTimeFormatType == '24 Hour':
-                log('setValues', 'formatting us 24 hour time')
-                formattedTimeString = episodeTime.strftime('%H:%M:%S')
-            elif episodeTimeFormatType == 'AM/PM':
-                log('setValues', 'formatting us AM/PM time')
-                formattedTimeString = episodeTime.strftime('%I:%M:%S %p')
-            log('setValues', 'formatted time %s', formattedTimeString)
+            if prefs.episodeTimeFormat is not None:
+                log('getValues', 'formatting us %s time', prefs.episodeTimeFormatType)
+                formattedTimeString = episodeTime.strftime(prefs.episodeTimeFormat)
+            log('getValues', 'formatted time %s', formattedTimeString)
 
             # prepend the time to the title
-            self.episodeTitle = formattedTimeString + ' ' + self.episodeTitle
+            values['episodeTitle'] = formattedTimeString + ' ' + values['episodeTitle']
+
+        return values
 
                 
 class SeriesEpisodeMediaParser(BaseMediaParser):
@@ -529,23 +2617,36 @@ class SeriesEpisodeMediaParser(BaseMediaParser):
                 r'[sc|season|chapter|lesson]*?[ ]*?(?P<seasonNumber>[0-9]+)[\\/](?P<showTitle>[^\\/]+)[\\/](?P<episodeNumber>[0-9]+)[ ]*[-\.]{0,1}[ ]*(?P<episodeTitle>.*)\.(?P<ext>.+)$'
                 ]
 
-    def setValues(self, match):
-        # set the common values
-        BaseMediaParser.setValues(self, match)
+    def getRequiredTokens(self):
+        return [('seasonEpisode',), ('episode',), ('episode',), ('numberedFile',), ('numberedFile',), ('episode',), ('episode',),
+                ('numberedFile',), ('numberedFile',)]
+
+    def getFileValues(self, mediaFile, pathValues, directoryIndex=None):
+        # get the common values
+        values = BaseMediaParser.getFileValues(self, mediaFile, pathValues, directoryIndex)
         
         # check to see if the "use last modified timestamp" preference is enabled
-        if bool(Prefs['episode.use.last.modified.timestamp.enabled']):
-            logDebug('setValues', "Use last modified timestamp option is enabled - extracting release date from the file's last modified timestamp")
+        prefs = getPreferences()
+        if prefs.useLastModifiedTimestamp:
+            logDebug('getValues', "Use last modified timestamp option is enabled - extracting release date from the file's last modified timestamp")
             # Get the release date from the file
-            self.episodeReleaseDate = datetime.date.fromtimestamp(os.path.getmtime(self.mediaFile))
-            logDebug('setValues', 'episode date: %s', str(self.episodeReleaseDate))
+            values['episodeReleaseDate'] = datetime.date.fromtimestamp(self.getMediaStat(mediaFile, directoryIndex).st_mtime)
+            logDebug('getValues', 'episode date: %s', values['episodeReleaseDate'])
 
         # check to see if the "use last modified timestamp" preference is enabled
-        elif bool(Prefs['episode.use.created.timestamp.enabled']):
-            logDebug('setValues', "Use created timestamp option is enabled - extracting release date from the file's created timestamp")
+        elif prefs.useCreatedTimestamp:
+            logDebug('getValues', "Use created timestamp option is enabled - extracting release date from the file's created timestamp")
             # Get the release date from the file
-            self.episodeReleaseDate = datetime.date.fromtimestamp(os.path.getctime(self.mediaFile))
-            logDebug('setValues', 'episode date: %s', str(self.episodeReleaseDate))
+            values['episodeReleaseDate'] = datetime.date.fromtimestamp(self.getMediaStat(mediaFile, directoryIndex).st_ctime)
+            logDebug('getValues', 'episode date: %s', values['episodeReleaseDate'])
+
+        return values
+
+    def getMediaStat(self, mediaFile, directoryIndex):
+        mediaStat = statFile(mediaFile, directoryIndex)
+        if mediaStat is None:
+            raise OSError('media file %s does not exist' % mediaFile)
+        return mediaStat
         
 
 class SeriesDatedEpisodeMediaParser(BaseMediaParser):
@@ -573,8 +2674,191 @@ class SeriesDatedEpisodeMediaParser(BaseMediaParser):
             #Show Title - e09 - 12-31-2015 - Episode Title.mp4
             r'[\\/](?P<showTitle>[^\\/]+?)[ ]*[-\.]{0,1}[ ]*[e](?P<episodeNumber>[0-9]+)[ ]*[-\.]{0,1}[ ]*(?P<episodeMonth>[0-9]{2})[-\. ](?P<episodeDay>[0-9]{2})[-\. ](?P<episodeYear>[0-9]{4})[ ]*[-\.]{0,1}[ ]*(?P<episodeTitle>.*)\.(?P<ext>.+)$'
         ]
+
+    def getRequiredTokens(self):
+        return [('seasonEpisode', 'episodeDate'), ('seasonEpisode', 'episodeUsDate'), ('seasonEpisode', 'episodeDate'), ('seasonEpisode', 'episodeUsDate'),
+                ('episodeDate',), ('episodeUsDate',), ('episodeDate',), ('episodeUsDate',), ('episodeDate',), ('episodeUsDate',)]
         
+class MatchHint(object):
+    '''
+        Remembers the pattern that won for the previous media file of a show so the match engine searches it first
+        for the next file, and counts how often it won again
+    '''
+
+    def __init__(self):
+        self.position = None
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, hintPosition, winnerPosition):
+        '''
+        Records the winner of a match - the hint was a hit when it won again
+        '''
+        if hintPosition is not None:
+            if winnerPosition == hintPosition:
+                self.hits = self.hits + 1
+            else:
+                self.misses = self.misses + 1
+        if winnerPosition is not None:
+            self.position = winnerPosition
+
+    def getStatistics(self):
+        matches = self.hits + self.misses
+        hitRate = None
+        if matches > 0:
+            hitRate = round(float(self.hits) / matches, 3)
+        return {'hits': self.hits, 'misses': self.misses, 'hitRate': hitRate}
+
+class SeriesMatchEngine(object):
+    '''
+        Finds the series parser that matches a media file in a single pass over the
+        precompiled regular expressions of all the parsers, in parser priority order.
+        A regular expression is skipped without searching it when the path does not contain one of the tokens the
+        regular expression requires - the tokens are searched at most once per path.
+        The engine shares one instance of each parser and only calls the stateless createResult on it.
+        Callers must not use parse, parseMatch or the get* methods on the parsers returned by match.
+    '''
+
+    def __init__(self, parsers):
+        self.parsers = parsers
+        self.tokenRegexes = dict((name, re.compile(regex, re.IGNORECASE)) for name, regex in PATH_TOKEN_REGEXES.items())
+        self.patterns = []
+        for parser in parsers:
+            regexes = parser.getCompiledRegexes()
+            requiredTokens = parser.getRequiredTokens()
+            if len(requiredTokens) != len(regexes):
+                raise ValueError('%s has %s regular expressions and %s required token lists' % (type(parser).__name__, len(regexes), len(requiredTokens)))
+            for patternIndex, regex in enumerate(regexes):
+                tokenNames = tuple(requiredTokens[patternIndex])
+                if regex.pattern.endswith(PATH_EXTENSION_PATTERN_SUFFIX):
+                    tokenNames = tokenNames + ('extension',)
+                self.patterns.append((parser, patternIndex, regex, tokenNames))
+
+    def containsTokens(self, mediaFile, tokenNames, foundTokens):
+        '''
+        Tests whether the path contains all of the tokens. foundTokens keeps the tokens that were searched for the path
+        '''
+        for tokenName in tokenNames:
+            found = foundTokens.get(tokenName)
+            if found is None:
+                found = self.tokenRegexes[tokenName].search(mediaFile) is not None
+                foundTokens[tokenName] = found
+            if not found:
+                return False
+        return True
+
+    def searchPattern(self, position, mediaFile, foundTokens):
+        '''
+        Searches the pattern at the position in the priority order - None is returned without searching when the path
+        does not contain one of its tokens
+        '''
+        parser, patternIndex, regex, tokenNames = self.patterns[position]
+        if tokenNames and not self.containsTokens(mediaFile, tokenNames, foundTokens):
+            return None, False
+        return regex.search(mediaFile), True
+
+    def match(self, mediaFile, metrics=None, hint=None):
+        '''
+        Returns the winning parser, the index of the matching pattern and the match object.
+        (None, None, None) is returned if none of the parsers match the media file.
+        When a MatchHint is passed the pattern that won for the previous file is searched first. If it matches only
+        the patterns with a higher priority are searched - the winner is the same as without the hint.
+        The time is recorded per winning parser and the matches per parser and pattern index into the metrics
+        when they are passed - the number of patterns that were searched and skipped is counted as regex.searches
+        and regex.skipped
+        '''
+        startTime = time.time()
+        foundTokens = {}
+        searches = 0
+        skipped = 0
+        winner = None
+        hintPosition = None
+        hintMatch = None
+        if hint is not None:
+            hintPosition = hint.position
+        if hintPosition is not None:
+            hintMatch, searched = self.searchPattern(hintPosition, mediaFile, foundTokens)
+            if searched:
+                searches = searches + 1
+            else:
+                skipped = skipped + 1
+
+        # the patterns after a matching hint cannot win
+        end = len(self.patterns)
+        if hintMatch:
+            end = hintPosition
+        for position in range(end):
+            if position == hintPosition:
+                continue
+            match, searched = self.searchPattern(position, mediaFile, foundTokens)
+            if searched:
+                searches = searches + 1
+            else:
+                skipped = skipped + 1
+            if match:
+                winner = (position, match)
+                break
+        if winner is None and hintMatch:
+            winner = (hintPosition, hintMatch)
+
+        if hint is not None:
+            hint.update(hintPosition, winner[0] if winner is not None else None)
+
+        if metrics is not None:
+            metrics.count('regex.searches', searches)
+            metrics.count('regex.skipped', skipped)
+        if winner is not None:
+            position, match = winner
+            parser, patternIndex = self.patterns[position][:2]
+            logDebug('match', 'parser %s pattern %s matches', type(parser).__name__, patternIndex)
+            if metrics is not None:
+                parserName = type(parser).__name__
+                metrics.addTime('regex.' + parserName, time.time() - startTime)
+                metrics.count('regex.%s.%s' % (parserName, patternIndex))
+            return parser, patternIndex, match
+
+        if metrics is not None:
+            metrics.addTime('regex.unmatched', time.time() - startTime)
+        return None, None, None
+
+    def parse(self, mediaFile, directoryIndex=None, metrics=None, hint=None):
+        '''
+        Parses the media file with the winning parser and returns the MediaParseResult or None if no parser matches.
+        The hint is passed on to match when the path has to be matched.
+        The values parsed from the path are cached by path and preferences - only the summary file and timestamp
+        lookups are repeated for a path that was parsed before. They go through the directory index when one is passed
+        '''
+        key = (mediaFile, getPreferences().hash)
+        cached = PARSE_RESULT_CACHE.get(key)
+        if cached is None:
+            parser, patternIndex, match = self.match(mediaFile, metrics, hint)
+            pathValues = None
+            if parser is not None:
+                pathValues = parser.getPathValues(mediaFile, match)
+            cached = (parser, pathValues)
+            PARSE_RESULT_CACHE.put(key, cached)
+        else:
+            logDebug('parse', 'using cached parse result of %s', mediaFile)
+            if metrics is not None:
+                metrics.count('parse.cached')
+
+        parser, pathValues = cached
+        if parser is None:
+            return None
+        log('parse', 'parser %s contains match - parsing file path', type(parser).__name__)
+        return MediaParseResult(**parser.getFileValues(mediaFile, pathValues, directoryIndex))
+
+# the series parsers in the order in which they take priority
+SERIES_PARSER_ENGINE = SeriesMatchEngine([SeriesDatedEpisodeMediaParser(), SeriesDateTimeBasedMediaParser(), SeriesDateBasedMediaParser(), SeriesEpisodeMediaParser()])
+
+def ValidatePrefs():
+    # called by Plex when the plugin preferences are saved
+    invalidatePreferences()
+
 def Start():
+    refreshPreferences()
+    # send the season writes that were queued before the agent stopped
+    SEASON_WRITE_QUEUE.start(getSeasonUpdateMaxWorkers())
     log('Start', 'starting agents %s, %s', SERIES_AGENT_NAME)
     pass
 
@@ -604,15 +2888,16 @@ class ExtendedPersonalMediaAgentTVShows(Agent.TV_Shows):
     accepts_from = ['com.plexapp.agents.localmedia']
 
     def search(self, results, media, lang):
+        refreshPreferences()
         logDebug('search', 'media id: %s', media.id)
-        logDebug('search', 'media file name: %s', str(media.filename))
-        logDebug('search', 'media primary metadata: %s', str(media.primary_metadata))
-        logDebug('search', 'media primary agent: %s', str(media.primary_agent))
-        logDebug('search', 'media title: %s', str(media.title))
-        logDebug('search', 'media show: %s', str(media.show))
-        logDebug('search', 'media name: %s', str(media.name))
-        logDebug('search', 'media season: %s', str(media.season))
-        logDebug('search', 'media episode: %s', str(media.episode))
+        logDebug('search', 'media file name: %s', media.filename)
+        logDebug('search', 'media primary metadata: %s', media.primary_metadata)
+        logDebug('search', 'media primary agent: %s', media.primary_agent)
+        logDebug('search', 'media title: %s', media.title)
+        logDebug('search', 'media show: %s', media.show)
+        logDebug('search', 'media name: %s', media.name)
+        logDebug('search', 'media season: %s', media.season)
+        logDebug('search', 'media episode: %s', media.episode)
 
         # Compute the GUID based on the media hash.
         try:
@@ -625,19 +2910,36 @@ class ExtendedPersonalMediaAgentTVShows(Agent.TV_Shows):
 
         results.Append(MetadataSearchResult(id=media.id, name=media.show, year=None, lang=lang, score=100))
 
-    def update(self, metadata, media, lang):
+    def update(self, metadata, media, lang, force=False):
         #test.test('Extended Personal Media - Scan')
+        updateStartTime = time.time()
+        prefs = refreshPreferences()
+        # timers and counters of this update
+        metrics = Metrics()
         logDebug('update', 'meta data agent object id: %s', id(self))
-        logDebug('update', 'metadata: %s', str(metadata))
-        logDebug('update', 'media: %s', str(media))
-        logDebug('update', 'lang: %s', str(lang))
+        logDebug('update', 'metadata: %s', metadata)
+        logDebug('update', 'media: %s', media)
+        logDebug('update', 'lang: %s', lang)
         # set the metadata title
         metadata.title = media.title
         showTitle = metadata.title
         logDebug('update', 'show id: %s', media.id)
         logDebug('update', 'show title: %s', metadata.title)
-        # list of file paths
-        showFilePaths = []
+        # directories of the show's files
+        showDirectories = DirectorySet()
+        # number of episodes and of the episodes that did not change since the last update
+        episodeCount = 0
+        skippedEpisodes = 0
+        # directory listings shared by all of the summary and metadata file lookups of the show
+        directoryIndex = DirectoryIndex()
+        # the pattern that matched the previous episode is searched first for the next episode
+        matchHint = MatchHint()
+        # the show manifest is looked up from the directory of the first episode
+        manifest = None
+        manifestFingerprint = None
+        manifestLookedUp = False
+        # summary files of the episodes and seasons that are watched for changes after the update
+        watchTargets = []
         for s in media.seasons:
             logDebug('update', 'season %s', s)
             seasonId = media.seasons[s].id
@@ -646,13 +2948,15 @@ class ExtendedPersonalMediaAgentTVShows(Agent.TV_Shows):
             logDebug('update', 'season metadata %s', seasonMetadata)
             logDebug('update', 'season title: %s', seasonMetadata.title)
             metadata.seasons[s].index = int(s)
-            seasonFilePaths = []
+            seasonDirectories = DirectorySet()
 
             # store the season number/title from one of the episodes
             seasonTitle = None   
             seasonNumber = None
             for e in media.seasons[s].episodes:
                 logDebug('update', 'episode: %s', e)
+                episodeStartTime = time.time()
+                episodeCount = episodeCount + 1
                 # Make sure metadata exists, and find sidecar media.
                 episodeId = media.seasons[s].episodes[e].id
                 episodeMetadata = metadata.seasons[s].episodes[e]
@@ -665,37 +2969,82 @@ class ExtendedPersonalMediaAgentTVShows(Agent.TV_Shows):
                 absFilePath = os.path.abspath(unicodize(file))
                 log('update', 'absolute file path: %s', absFilePath)
 
-                # list of series parsers
-                series_parsers = [SeriesDatedEpisodeMediaParser(), SeriesDateTimeBasedMediaParser(), SeriesDateBasedMediaParser(), SeriesEpisodeMediaParser()]
-                # Iterate over the list of parsers and parse the file path
-                for parser in series_parsers:
-                    if parser.containsMatch(absFilePath) is True:
-                        logDebug('update', 'parser object id: %s', id(parser))
-                        log('update', 'parser %s contains match - parsing file path', parser)
-                        parser.parse(absFilePath)
-
+                if not manifestLookedUp:
+                    startTime = time.time()
+                    manifest = findShowManifest([absFilePath], directoryIndex)
+                    if manifest is not None:
+                        manifestStat = statFile(manifest.filePath, directoryIndex)
+                        if manifestStat is not None:
+                            manifestFingerprint = (manifestStat.st_size, manifestStat.st_mtime)
+                    manifestLookedUp = True
+                    metrics.addTime('showManifest', time.time() - startTime)
+
+                # watch the summary file of the episode unless the show manifest has the summary
+                if prefs.watchEnabled and (manifest is None or manifest.getEpisodeSummary(absFilePath) is None):
+                    summaryFilePath = getEpisodeSummaryFilePath(absFilePath)
+                    if summaryFilePath is not None:
+                        watchTargets.append((('episode', episodeId, media.id), [summaryFilePath]))
+
+                # skip the episode if nothing changed since it was last processed - Plex still has its values
+                startTime = time.time()
+                fingerprint = getEpisodeFingerprint(absFilePath, prefs, directoryIndex, manifestFingerprint)
+                episodeSeason = None
+                if not force and fingerprint is not None and isNotBlank(episodeMetadata.title):
+                    episodeSeason = EPISODE_FINGERPRINTS.getSeason(episodeId, fingerprint)
+                metrics.addTime('fingerprint', time.time() - startTime)
+                if episodeSeason is not None:
+                    log('update', 'episode did not change since the last update - skipping it')
+                    skippedEpisodes = skippedEpisodes + 1
+                else:
+                    # parse the file path with the parser that matches it
+                    startTime = time.time()
+                    parseResult = SERIES_PARSER_ENGINE.parse(absFilePath, directoryIndex, metrics, matchHint)
+                    metrics.addTime('parse', time.time() - startTime)
+                    if parseResult is not None:
+                        # the summary in the show manifest takes priority over the summary file
+                        episodeSummary = None
+                        if manifest is not None:
+                            episodeSummary = manifest.getEpisodeSummary(absFilePath)
+                        if episodeSummary is not None:
+                            metrics.count('showManifest.episodeSummaries')
+                        elif parseResult.summaryFilePath is not None:
+                            startTime = time.time()
+                            episodeSummary = loadTextFromFile(parseResult.summaryFilePath, directoryIndex, metrics)
+                            metrics.addTime('episodeSummary', time.time() - startTime)
                         # set the episode data
-                        episodeMetadata.title = parser.getEpisodeTitle()
-                        episodeMetadata.summary = parser.getEpisodeSummary()
-                        episodeMetadata.originally_available_at = parser.getEpisodeReleaseDate()
+                        startTime = time.time()
+                        episodeMetadata.title = parseResult.episodeTitle
+                        episodeMetadata.summary = episodeSummary
+                        episodeMetadata.originally_available_at = parseResult.episodeReleaseDate
+                        metrics.addTime('metadata', time.time() - startTime)
                         log('update', 'episode.title: %s', episodeMetadata.title)
                         log('update', 'episode.summary: %s', episodeMetadata.summary)
                         log('update', 'episode.originally_available_at: %s', episodeMetadata.originally_available_at)
+                        episodeSeason = (parseResult.seasonNumber, parseResult.seasonTitle)
+                        EPISODE_FINGERPRINTS.putSeason(episodeId, fingerprint, parseResult.seasonNumber, parseResult.seasonTitle)
 
-                        # add the file path to the season file path list
-                        seasonFilePaths = self.addFilePath(seasonFilePaths, absFilePath)
-                        # add the file path to the show file path list
-                        showFilePaths = self.addFilePath(showFilePaths, absFilePath)
+                if episodeSeason is not None:
+                    episodeSeasonNumber, episodeSeasonTitle = episodeSeason
 
-                        # get the season title from one of the episodes
-                        if seasonTitle is None and isNotBlank(parser.getSeasonTitle()):
-                            seasonTitle = parser.getSeasonTitle()
+                    # add the directory of the file to the season and show directories
+                    episodeDirPath = absFilePath
+                    if directoryIndex.isFile(episodeDirPath):
+                        episodeDirPath = os.path.dirname(episodeDirPath)
+                    seasonDirectories.add(episodeDirPath)
+                    showDirectories.add(episodeDirPath)
 
-                        # get the season number from one of the episodes
-                        if seasonNumber is None and isNotBlank(parser.getSeasonNumber()):
-                            seasonNumber = parser.getSeasonNumber()
+                    # get the season title from one of the episodes
+                    if seasonTitle is None and isNotBlank(episodeSeasonTitle):
+                        seasonTitle = episodeSeasonTitle
 
-                        break
+                    # get the season number from one of the episodes
+                    if seasonNumber is None and isNotBlank(episodeSeasonNumber):
+                        seasonNumber = episodeSeasonNumber
+
+                episodeTime = time.time() - episodeStartTime
+                metrics.addTime('episode', episodeTime)
+                if prefs.slowEpisodeThreshold is not None and episodeTime >= prefs.slowEpisodeThreshold:
+                    metrics.addSlowEpisode(absFilePath, episodeTime)
 
             # Check for season summary
             summaryFileExt = getSummaryFileExtension()
@@ -716,10 +3065,21 @@ class ExtendedPersonalMediaAgentTVShows(Agent.TV_Shows):
                                 'c' + seasonNumber + summaryFileExt, 
                                 'L' + seasonNumber + summaryFileExt, 
                                 'l' + seasonNumber + summaryFileExt]
-            seasonSummary = findSeasonSummary(seasonFilePaths, seasonFileNames)
+            # the title and summary in the show manifest take priority over the parsed title and the summary files
+            seasonSummary = None
+            if manifest is not None:
+                manifestSeasonNumber = seasonNumber if seasonNumber is not None else s
+                seasonSummary = manifest.getSeasonValue(manifestSeasonNumber, 'summary')
+                manifestSeasonTitle = manifest.getSeasonValue(manifestSeasonNumber, 'title')
+                if manifestSeasonTitle is not None:
+                    seasonTitle = manifestSeasonTitle
+            if seasonSummary is None:
+                startTime = time.time()
+                seasonSummary = findSeasonSummary(seasonDirectories, seasonFileNames, directoryIndex, metrics)
+                metrics.addTime('seasonSummary', time.time() - startTime)
             
             # create a map for the season data that we want to update
-            seasonDataMap = {'id':seasonId, 'title':'', 'summary':''}
+            seasonDataMap = {'id':seasonId, 'title':'', 'summary':'', 'showId':media.id}
             if seasonSummary is not None:
                 #seasonMetadata.summary = seasonSummary
                 seasonDataMap['summary'] = seasonSummary
@@ -730,68 +3090,96 @@ class ExtendedPersonalMediaAgentTVShows(Agent.TV_Shows):
                 #seasonMetadata.title = seasonTitle
                 seasonDataMap['title'] = seasonTitle
                 log('update', 'season.title: %s', seasonTitle)
-            # Set the season details
-            setSeasonMetadata(seasonDataMap)
+            # Set the season details - the write is sent in the background
+            SEASON_WRITE_QUEUE.put(seasonDataMap, getSeasonUpdateMaxWorkers())
+
+            # watch the season summary files in the season directories and the directories above them unless the
+            # show manifest has the summary
+            if prefs.watchEnabled and (manifest is None or manifest.getSeasonValue(manifestSeasonNumber, 'summary') is None):
+                seasonFilePaths = OrderedDict()
+                for seasonDirPath in seasonDirectories:
+                    for dirPath in (seasonDirPath, os.path.dirname(seasonDirPath)):
+                        for seasonFileName in seasonFileNames:
+                            seasonFilePaths[os.path.join(dirPath, seasonFileName)] = True
+                watchTargets.append((('season', seasonId, media.id, seasonDataMap['title'], tuple(seasonDirectories), tuple(seasonFileNames)),
+                                     list(seasonFilePaths)))
             
         # Check for show summary
         summaryFileExt = getSummaryFileExtension()
-        showSummary = findShowSummary(showFilePaths, [showTitle + summaryFileExt, 'show' + summaryFileExt])
+        showSummary = None
+        if manifest is not None:
+            showSummary = manifest.getShowValue('summary')
+        if showSummary is None:
+            startTime = time.time()
+            showSummary = findShowSummary(showDirectories, [showTitle + summaryFileExt, 'show' + summaryFileExt], directoryIndex, metrics)
+            metrics.addTime('showSummary', time.time() - startTime)
         if showSummary is not None:
             metadata.summary = showSummary
             log('update', 'show.summary: %s', metadata.summary)
 
-        if bool(Prefs['use.show.metadata.enabled']):
+        if getPreferences().useShowMetadata:
             logDebug('update', 'use metadata file option is enabled - extracting metadata from metadata file')
             metadataFileExt = getMetadataFileExtension()
-            showMetadataFilePath = findShowMetadata(showFilePaths, [showTitle + metadataFileExt, 'show' + metadataFileExt])
+            startTime = time.time()
+            showMetadataFilePath = findShowMetadata(showDirectories, [showTitle + metadataFileExt, 'show' + metadataFileExt], directoryIndex)
+            metrics.addTime('showMetadata', time.time() - startTime)
+            # the values in the show manifest take priority over the values in the metadata file
+            fileMetadata = None
             if showMetadataFilePath is not None:
-                fileMetadata = CustomParserMetadata(showMetadataFilePath)
-                release = fileMetadata.release()
+                fileMetadata = SHOW_FILE_CACHE.load(showMetadataFilePath, CustomParserMetadata, directoryIndex)
+            if manifest is not None or fileMetadata is not None:
+                release = None
+                studio = None
+                genres = None
+                if manifest is not None:
+                    release = manifest.getShowValue('release')
+                    studio = manifest.getShowValue('studio')
+                    genres = manifest.getShowValue('genres')
+                if fileMetadata is not None:
+                    if release is None:
+                        release = fileMetadata.release()
+                    if studio is None:
+                        studio = fileMetadata.studio()
+                    if genres is None:
+                        genres = fileMetadata.genres()
                 if release is not None:
                     metadata.originally_available_at = datetime.datetime.strptime(release, '%Y-%m-%d')
                     log('update', 'show.metadata - release: %s', release)
-                studio = fileMetadata.studio()
                 if studio is not None:
                     metadata.studio = studio
                     log('update', 'show.metadata - studio: %s', studio)
-                genres = fileMetadata.genres() 
                 if genres is not None:
                     metadata.genres = genres.split(",")
                     log('update', 'show.metadata - genres: %s', genres)
 
-
-    def addFilePath(self, filePaths, newFilePath):
-        '''
-        Adds the specified file path to the list if it is a sub-directory or a unique file path
-        '''
-        evalPaths = []
-
-        newDirPath = newFilePath
-        if os.path.isfile(newDirPath):
-            newDirPath = os.path.dirname(newDirPath)
-        # determine if the new path is a sub-path or a new path
-        logDebug('addFilePath', 'verifying file path [%s] should be added', newDirPath)
-        appendPath = True
-        for path in filePaths:
-            path = os.path.normpath(os.path.normcase(path))
-            logDebug('addFilePath', 'existing path [%s]', path)
-            newDirPath = os.path.normpath(os.path.normcase(newDirPath))
-            logDebug('addFilePath', 'new path [%s]', newDirPath)
-            if newDirPath == path:
-                logDebug('addFilePath', 'paths are equivalent - keeping existing path [%s]', path)
-                evalPaths.append(path)
-                appendPath = False
-            elif newDirPath.startswith(path):
-                logDebug('addFilePath', 'path [%s] is a subdirectory of [%s] - keeping new path [%s]', newDirPath, path, newDirPath)
-                evalPaths.append(newDirPath)
-                appendPath = False
-            else:
-                logDebug('addFilePath', 'keeping existing path [%s]', newDirPath)
-                evalPaths.append(path)
-
-        # path is a new path - keep it
-        if appendPath:
-            logDebug('addFilePath', 'keeping new path [%s]', newDirPath)
-            evalPaths.append(newDirPath)
-
-        return evalPaths
+        # keep the summaries that were read for the next refresh - the save is skipped until enough changes accumulate
+        startTime = time.time()
+        SIDECAR_TEXT_CACHE.save()
+        log('update', 'sidecar text cache: %s', SIDECAR_TEXT_CACHE.getStatistics())
+        EPISODE_FINGERPRINTS.save()
+        log('update', 'episodes: %s skipped, %s processed - totals %s', skippedEpisodes, episodeCount - skippedEpisodes, EPISODE_FINGERPRINTS.getStatistics())
+        SEASON_WRITE_TRACKER.save()
+        SEASON_WRITE_QUEUE.save()
+        metrics.addTime('save', time.time() - startTime)
+        log('update', 'season writes: %s', SEASON_WRITE_TRACKER.getStatistics())
+        log('update', 'season write queue: %s', SEASON_WRITE_QUEUE.getStatistics())
+        log('update', 'plex api: %s, circuit breaker: %s', PLEX_HTTP_CLIENT.getStatistics(), PLEX_HTTP_CLIENT.circuitBreaker.getStatistics())
+        log('update', 'parse result cache: %s', PARSE_RESULT_CACHE.getStatistics())
+        log('update', 'file system: %s', directoryIndex.getStatistics())
+        log('update', 'parser dispatch: %s', matchHint.getStatistics())
+        if prefs.watchEnabled:
+            SIDECAR_WATCHER.watchShow(media.id, watchTargets, directoryIndex)
+            log('update', 'summary file watcher: %s', SIDECAR_WATCHER.getStatistics())
+        log('update', 'suppressed debug messages: %s', DEBUG_LOGGER.getSuppressedCount())
+
+        # one summary line of the timers and counters of this update
+        fileSystemStatistics = directoryIndex.getStatistics()
+        metrics.count('episodes', episodeCount)
+        metrics.count('episodes.skipped', skippedEpisodes)
+        metrics.count('fileSystem.directories', fileSystemStatistics['directories'])
+        metrics.count('fileSystem.statCalls', fileSystemStatistics['statCalls'])
+        metrics.count('dispatch.hits', matchHint.hits)
+        metrics.count('dispatch.misses', matchHint.misses)
+        metrics.addTime('update', time.time() - updateStartTime)
+        METRICS.add(metrics)
+        log('update', 'metrics: show=%s %s', media.id, metrics.format())
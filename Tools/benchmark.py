@@ -0,0 +1,211 @@
+'''
+Benchmarks the agent's update() outside of Plex Media Server. A synthetic library is generated, the Plex Framework
+globals are stubbed and the Plex Media Server API is answered by a local stand-in server. Every round updates all of
+the shows and reports the episodes per second, the file system calls, the HTTP requests and the peak memory.
+The first round runs with cold caches, the later rounds show the effect of the agent's caches.
+
+    python2.7 Tools/benchmark.py --shows 86 --seasons 4 --episodes 25 --rounds 3
+'''
+from __future__ import print_function
+
+import argparse, json, os, resource, shutil, sys, tempfile, time
+
+import library, plexstub
+
+class CallCounter(object):
+    '''
+        Counts the calls of functions that are replaced by counting wrappers
+    '''
+
+    def __init__(self):
+        self.counts = {}
+        self.originals = []
+
+    def wrap(self, owner, name, counterName):
+        original = getattr(owner, name)
+        counts = self.counts
+        counts[counterName] = 0
+        def countingWrapper(*args, **kwargs):
+            counts[counterName] = counts[counterName] + 1
+            return original(*args, **kwargs)
+        self.originals.append((owner, name, original))
+        setattr(owner, name, countingWrapper)
+
+    def reset(self):
+        for counterName in self.counts:
+            self.counts[counterName] = 0
+
+    def restore(self):
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        del self.originals[:]
+
+class Namespace(object):
+    '''
+        Wraps the agent's namespace dictionary so functions in it can be replaced with setattr
+    '''
+
+    def __init__(self, namespace):
+        self.__dict__['namespace'] = namespace
+
+    def __getattr__(self, name):
+        return self.namespace[name]
+
+    def __setattr__(self, name, value):
+        self.namespace[name] = value
+
+def getPeakMemory():
+    '''
+    Gets the peak resident set size of the process in MB - ru_maxrss is in kilobytes on Linux and bytes on OS X
+    '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak / (1024.0 * 1024.0)
+    return peak / 1024.0
+
+def createMedia(shows):
+    '''
+    Creates the Plex media trees of the shows with unique ids
+    '''
+    nextId = [1000]
+    def createId():
+        nextId[0] = nextId[0] + 1
+        return nextId[0]
+    mediaList = []
+    for show in shows:
+        media = plexstub.Item(title=show.title, id=createId(), seasons={})
+        for seasonNumber, episodePaths in sorted(show.seasons.items()):
+            season = plexstub.Item(id=createId(), episodes={})
+            for episodeNumber, episodePath in enumerate(episodePaths):
+                part = plexstub.Item(file=episodePath)
+                season.episodes[str(episodeNumber + 1)] = plexstub.Item(id=createId(), items=[plexstub.Item(parts=[part])])
+            media.seasons[str(seasonNumber)] = season
+        mediaList.append(media)
+    return mediaList
+
+def getPatternCoverage(agent, shows):
+    '''
+    Counts the parser patterns that match at least one of the generated episodes and the episodes no pattern matches
+    '''
+    engine = agent['SERIES_PARSER_ENGINE']
+    matchedPatterns = set()
+    unmatched = 0
+    for show in shows:
+        for episodePaths in show.seasons.values():
+            for episodePath in episodePaths:
+                parser, patternIndex, match = engine.match(episodePath)
+                if parser is None:
+                    unmatched = unmatched + 1
+                else:
+                    matchedPatterns.add((type(parser).__name__, patternIndex))
+    return len(matchedPatterns), len(engine.patterns), unmatched
+
+def getSlowestTimers(metrics, count):
+    '''
+    Formats the timers with the longest total time as name total ms
+    '''
+    timers = sorted(metrics['timers'].items(), key=lambda item: item[1]['totalMs'], reverse=True)
+    return ', '.join('%s %.1fms' % (name, timer['totalMs']) for name, timer in timers[:count] if name not in ('update', 'episode'))
+
+def runRound(agent, mediaList, metadataList, counter, server, flushTimeout):
+    counter.reset()
+    agent['resetMetrics']()
+    requestsBefore = server.getRequestCounts()
+    metadataAgent = agent['ExtendedPersonalMediaAgentTVShows']()
+    episodeCount = 0
+    startTime = time.time()
+    for media, metadata in zip(mediaList, metadataList):
+        metadataAgent.update(metadata, media, 'en')
+        episodeCount = episodeCount + sum(len(season.episodes) for season in media.seasons.values())
+    elapsed = time.time() - startTime
+    # the season writes are sent in the background - wait for them before the requests are counted
+    flushStartTime = time.time()
+    flushed = agent['SEASON_WRITE_QUEUE'].flush(flushTimeout)
+    flushElapsed = time.time() - flushStartTime
+    requestsAfter = server.getRequestCounts()
+    requests = dict((method, count - requestsBefore.get(method, 0)) for method, count in requestsAfter.items())
+    return {
+        'episodes': episodeCount,
+        'seconds': round(elapsed, 3),
+        'episodesPerSecond': round(episodeCount / elapsed, 1) if elapsed > 0 else None,
+        'statCalls': counter.counts['stat'],
+        'directoryListings': counter.counts['listdir'] + counter.counts.get('scandir', 0),
+        'flushSeconds': round(flushElapsed, 3),
+        'flushed': flushed,
+        'seasonWriteQueue': agent['SEASON_WRITE_QUEUE'].getStatistics(),
+        'circuitBreaker': agent['PLEX_HTTP_CLIENT'].circuitBreaker.getStatistics(),
+        'httpRequests': sum(count for method, count in requests.items() if method != 'failed'),
+        'httpRequestsByMethod': requests,
+        'peakMemoryMB': round(getPeakMemory(), 1),
+        'metrics': agent['getMetrics']()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the agent's update() against a synthetic library")
+    parser.add_argument('--shows', type=int, default=len(library.LAYOUTS), help='number of shows - the shows cycle through every documented layout')
+    parser.add_argument('--seasons', type=int, default=3, help='number of seasons per show')
+    parser.add_argument('--episodes', type=int, default=10, help='number of episodes per season')
+    parser.add_argument('--sidecars', type=float, default=0.5, help='ratio of episodes, seasons and shows with a summary file')
+    parser.add_argument('--rounds', type=int, default=2, help='number of times every show is updated')
+    parser.add_argument('--latency', type=float, default=0, help='seconds the stand-in server waits before answering')
+    parser.add_argument('--failure-rate', type=float, default=0, help='fraction of the requests the stand-in server answers with 503')
+    parser.add_argument('--retry-delay', type=float, default=None, help='seconds before a failed season write is retried - the first wait of the backoff')
+    parser.add_argument('--flush-timeout', type=float, default=600, help='seconds to wait for the season writes after every round')
+    parser.add_argument('--prefs', default='{}', help='plugin preferences as JSON e.g. {"logger.debug.enabled": true}')
+    parser.add_argument('--json', action='store_true', help='write the results of every round as a JSON line')
+    parser.add_argument('--verbose', action='store_true', help="write the agent's log messages to stderr")
+    parser.add_argument('--keep', action='store_true', help='keep the generated library')
+    args = parser.parse_args()
+
+    workPath = tempfile.mkdtemp(prefix='epm-benchmark-')
+    server = plexstub.PlexStandInServer(latency=args.latency, failureRate=args.failure_rate).start()
+    counter = CallCounter()
+    agent = None
+    try:
+        libraryPath = os.path.join(workPath, 'library')
+        shows = library.generateLibrary(libraryPath, args.shows, args.seasons, args.episodes, args.sidecars)
+        agent = plexstub.loadAgent(os.path.join(workPath, 'data'), json.loads(args.prefs), args.verbose)
+        plexstub.connectAgent(agent, server)
+        if args.retry_delay is not None:
+            agent['SEASON_WRITE_QUEUE'].retryDelay = args.retry_delay
+        mediaList = createMedia(shows)
+        # Plex keeps the metadata between updates
+        metadataList = [plexstub.createShowMetadata() for media in mediaList]
+
+        matchedPatterns, patternCount, unmatched = getPatternCoverage(agent, shows)
+        if not args.json:
+            print('library: %d shows, %d episodes in %s' % (len(shows), sum(show.getEpisodeCount() for show in shows), libraryPath))
+            print('patterns: %d of %d matched, %d episodes not matched' % (matchedPatterns, patternCount, unmatched))
+
+        counter.wrap(os, 'stat', 'stat')
+        counter.wrap(os, 'lstat', 'stat')
+        counter.wrap(os, 'listdir', 'listdir')
+        if agent.get('scandir') is not None:
+            counter.wrap(Namespace(agent), 'scandir', 'scandir')
+
+        for roundNumber in range(1, args.rounds + 1):
+            result = runRound(agent, mediaList, metadataList, counter, server, args.flush_timeout)
+            result['round'] = roundNumber
+            if args.json:
+                print(json.dumps(result, sort_keys=True))
+            else:
+                print('round %(round)d: %(episodes)d episodes in %(seconds).3fs (%(episodesPerSecond)s episodes/sec), '
+                      '%(statCalls)d stat calls, %(directoryListings)d directory listings, %(httpRequests)d HTTP requests %(httpRequestsByMethod)s, '
+                      'peak memory %(peakMemoryMB).1f MB' % result)
+                print('    season writes flushed in %(flushSeconds).3fs: %(seasonWriteQueue)s, circuit breaker %(circuitBreaker)s' % result)
+                print('    slowest steps: %s' % getSlowestTimers(result['metrics'], 8))
+    finally:
+        counter.restore()
+        # close the agent's keep-alive connections so the server's request threads finish
+        if agent is not None:
+            agent['SEASON_WRITE_QUEUE'].flush(args.flush_timeout)
+            for connection in agent['PLEX_HTTP_CLIENT'].idleConnections:
+                connection.close()
+        server.stop()
+        if args.keep:
+            print('kept %s' % workPath)
+        else:
+            shutil.rmtree(workPath)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+'''
+Generates synthetic libraries laid out the way the agent's parsers expect - every layout documented in the parsers'
+regular expressions is used. The media files are empty
+'''
+from __future__ import print_function
+
+import argparse, os, random
+
+# file layouts relative to the library root - one per documented layout of the parsers
+LAYOUTS = [
+    # SeriesDateBasedMediaParser
+    '{show}/{show} - {year}-{month}-{day}_{episode} - {title}.mp4',
+    '{show}/{show}.{year}.{month}.{day}_{episode}.{title}.mp4',
+    '{show}/{show} - {month}-{day}-{year}_{episode} - {title}.mp4',
+    '{show}/{year} - {seasonTitle}/{show} - {year}-{month}-{day} - {title}.mp4',
+    '{show}/{year}/{year}-{month}-{day} - {title}.mp4',
+    '{year} - {seasonTitle}/{show}/{show} - {year}-{month}-{day} - {title}.mp4',
+    '{year}/{show}/{year}-{month}-{day} - {title}.mp4',
+    '{show}/{year} - {seasonTitle}/{month}-{day}-{year} - {title}.mp4',
+    '{show}/{year}/{show} - {month}-{day}-{year} - {title}.mp4',
+    '{year} - {seasonTitle}/{show}/{month}-{day}-{year} - {title}.mp4',
+    '{year}/{show}/{show} - {month}-{day}-{year} - {title}.mp4',
+    '{show}/{year}/{month}-{day} - {title}.mp4',
+    '{year}/{show}/{show} - {month}-{day} - {title}.mp4',
+    # SeriesDateTimeBasedMediaParser
+    '{show}/{show} - {year}-{month}-{day}_{hour} {minute} {second} - {title}.mp4',
+    '{show}/{show}.{year}.{month}.{day}-{hour}.{minute}.{second}.{title}.mp4',
+    '{show}/{show} - {month}-{day}-{year}_{hour}-{minute}-{second} - {title}.mp4',
+    '{year}/{month}/{year}-{month}-{day} {hour} {minute} {second} - {title}.mp4',
+    '{show}/{year} - {seasonTitle}/{show} - {year}-{month}-{day} {hour} {minute} {second} - {title}.mp4',
+    '{show}/{year}/{year}-{month}-{day}_{hour}-{minute}-{second} - {title}.mp4',
+    '{year} - {seasonTitle}/{show}/{year}-{month}-{day}_{hour}-{minute}-{second} - {title}.mp4',
+    '{year}/{show}/{show} - {year}.{month}.{day}.{hour12}.{minute}.{second}.AM - {title}.mp4',
+    '{show}/{year} - {seasonTitle}/{month}-{day}-{year} {hour} {minute} {second} - {title}.mp4',
+    '{show}/{year}/{show} - {month}-{day}-{year} {hour} {minute} {second} - {title}.mp4',
+    '{year}/{show}/{month}.{day}.{year}_{hour12}.{minute}.{second}.AM - {title}.mp4',
+    '{show}/{year}/{month}-{day} {hour} {minute} {second} - {title}.mp4',
+    '{year}/{show}/{month}-{day}_{hour12}.{minute}.{second}.PM - {title}.mp4',
+    # SeriesEpisodeMediaParser
+    '{show}/{show} - s{year}e{episode} - {title}.mp4',
+    '{show}/{season} - {seasonTitle}/{show} - s{year}e{episode} - {title}.mp4',
+    '{season} - {seasonTitle}/{show}/{show} - s{year}e{episode} - {title}.mp4',
+    '{show}/{season} - {seasonTitle}/{episode} - {title}.mp4',
+    '{season} - {seasonTitle}/{show}/{episode} - {title}.mp4',
+    '{show}/{year}/e{episode} - {title}.mp4',
+    '{year}/{show}/e{episode} - {title}.mp4',
+    '{show}/{year}/{episode} - {title}.mp4',
+    '{year}/{show}/{episode} - {title}.mp4',
+    # SeriesDatedEpisodeMediaParser
+    '{show}/{show} - s{year}e{episode} - {year}-{month}-{day} - {title}.mp4',
+    '{show}/{show} - s{year}e{episode} - {month}-{day}-{year} - {title}.mp4',
+    '{show}/s{year}e{episode} - {year}-{month}-{day} - {title}.mp4',
+    '{show}/s{year}e{episode} - {month}-{day}-{year} - {title}.mp4',
+    '{show}/s{year}/e{episode} - {year}-{month}-{day} - {title}.mp4',
+    '{show}/s{year}/e{episode} - {month}-{day}-{year} - {title}.mp4',
+    '{show}/e{episode} - {year}-{month}-{day} - {title}.mp4',
+    '{show}/e{episode} - {month}-{day}-{year} - {title}.mp4',
+    '{show}/{show} - e{episode} - {year}-{month}-{day} - {title}.mp4',
+    '{show}/{show} - e{episode} - {month}-{day}-{year} - {title}.mp4',
+]
+
+class Show(object):
+    '''
+        Generated show - seasons maps the season number to the list of episode file paths
+    '''
+
+    def __init__(self, title, layout):
+        self.title = title
+        self.layout = layout
+        self.seasons = {}
+
+    def getEpisodeCount(self):
+        return sum(len(episodes) for episodes in self.seasons.values())
+
+def writeFile(filePath, contents=''):
+    dirPath = os.path.dirname(filePath)
+    if not os.path.isdir(dirPath):
+        os.makedirs(dirPath)
+    with open(filePath, 'wb') as generatedFile:
+        generatedFile.write(contents.encode('utf-8'))
+
+def createEpisodePath(libraryPath, layout, showTitle, seasonNumber, episodeNumber):
+    year = 2000 + seasonNumber
+    month = 1 + (episodeNumber - 1) // 28 % 12
+    day = 1 + (episodeNumber - 1) % 28
+    hour = episodeNumber % 24
+    values = {
+        'show': showTitle,
+        'season': '%02d' % seasonNumber,
+        'seasonTitle': 'Season Title %d' % seasonNumber,
+        'year': year,
+        'month': '%02d' % month,
+        'day': '%02d' % day,
+        'hour': '%02d' % hour,
+        'hour12': '%02d' % (hour % 12 or 12),
+        'minute': '%02d' % (episodeNumber % 60),
+        'second': '%02d' % (seasonNumber % 60),
+        'episode': '%02d' % episodeNumber,
+        'title': 'Episode %d of %s' % (episodeNumber, showTitle)
+    }
+    return os.path.join(libraryPath, *layout.format(**values).split('/'))
+
+def generateLibrary(libraryPath, showCount, seasonCount, episodeCount, sidecarRatio=0.5, seed=1):
+    '''
+    Generates the shows in the library directory and returns them. The shows cycle through the layouts. About
+    sidecarRatio of the episodes, seasons and shows get a summary sidecar file
+    '''
+    generator = random.Random(seed)
+    shows = []
+    for showIndex in range(showCount):
+        layout = LAYOUTS[showIndex % len(LAYOUTS)]
+        show = Show('Show %04d' % showIndex, layout)
+        for seasonNumber in range(1, seasonCount + 1):
+            episodePaths = []
+            for episodeNumber in range(1, episodeCount + 1):
+                episodePath = createEpisodePath(libraryPath, layout, show.title, seasonNumber, episodeNumber)
+                writeFile(episodePath)
+                if generator.random() < sidecarRatio:
+                    writeFile(os.path.splitext(episodePath)[0] + '.summary', u'Summary of %s\n' % os.path.basename(episodePath))
+                episodePaths.append(episodePath)
+            show.seasons[seasonNumber] = episodePaths
+            if generator.random() < sidecarRatio:
+                writeFile(os.path.join(os.path.dirname(episodePaths[0]), 'season-%d.summary' % seasonNumber), u'Summary of season %d\n' % seasonNumber)
+        if generator.random() < sidecarRatio:
+            showPath = os.path.join(libraryPath, show.title)
+            if os.path.isdir(showPath):
+                writeFile(os.path.join(showPath, 'show.summary'), u'Summary of %s\n' % show.title)
+        shows.append(show)
+    return shows
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates a synthetic library')
+    parser.add_argument('libraryPath')
+    parser.add_argument('--shows', type=int, default=len(LAYOUTS))
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--episodes', type=int, default=10)
+    parser.add_argument('--sidecars', type=float, default=0.5, help='ratio of episodes, seasons and shows with a summary file')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    shows = generateLibrary(args.libraryPath, args.shows, args.seasons, args.episodes, args.sidecars, args.seed)
+    print('generated %d shows with %d episodes' % (len(shows), sum(show.getEpisodeCount() for show in shows)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+'''
+Parses the media files in directory trees with the agent's series parsers outside of Plex Media Server and writes
+one JSON line per file - the show, season, episode title, release date, summary file and the parser and pattern that
+matched. Files that no parser matches are written with "matched": false. The files are parsed by a pool of processes.
+
+    python2.7 Tools/parse.py /mnt/ingest/drop-42 --processes 8 > drop-42.jsonl
+'''
+from __future__ import print_function
+
+import argparse, json, multiprocessing, os, sys, time
+
+import plexstub
+
+# extensions of the files that are parsed unless --all is used
+MEDIA_FILE_EXTENSIONS = ('.3gp', '.asf', '.avi', '.divx', '.flv', '.m2ts', '.m4v', '.mkv', '.mov', '.mp4', '.mpeg', '.mpg',
+                         '.mts', '.ogm', '.ts', '.vob', '.webm', '.wmv')
+
+# the agent loaded in this process
+AGENT = None
+
+def loadAgent(prefs):
+    global AGENT
+    AGENT = plexstub.loadAgent(prefs=prefs)
+
+def findMediaFiles(rootPaths, extensions):
+    '''
+    Walks the directory trees and yields the paths of the files with one of the extensions - every file is
+    yielded when extensions is None
+    '''
+    for rootPath in rootPaths:
+        for dirPath, dirNames, fileNames in os.walk(os.path.abspath(rootPath)):
+            dirNames.sort()
+            for fileName in sorted(fileNames):
+                if extensions is None or os.path.splitext(fileName)[1].lower() in extensions:
+                    yield os.path.join(dirPath, fileName)
+
+def parseMediaFile(mediaFile):
+    '''
+    Parses the media file with the agent's series parsers and returns the values as a dictionary
+    '''
+    values = {'file': mediaFile, 'matched': False}
+    try:
+        parser, patternIndex, match = AGENT['SERIES_PARSER_ENGINE'].match(mediaFile)
+        if parser is None:
+            return values
+        result = parser.createResult(mediaFile, match)
+    except Exception as e:
+        values['error'] = '%s: %s' % (type(e).__name__, e)
+        return values
+
+    releaseDate = result.episodeReleaseDate
+    values.update({
+        'matched': True,
+        'show': match.groupdict().get('showTitle'),
+        'seasonNumber': result.seasonNumber,
+        'seasonTitle': result.seasonTitle,
+        'episodeTitle': result.episodeTitle,
+        'releaseDate': releaseDate.isoformat() if releaseDate is not None else None,
+        'summaryFile': result.summaryFilePath,
+        'parser': type(parser).__name__,
+        'pattern': patternIndex
+    })
+    return values
+
+def parseMediaFiles(mediaFiles, processes=None, chunkSize=64, prefs=None):
+    '''
+    Parses the media files and yields the values of each file in the order of the media files. The files are
+    parsed by a pool of processes - in this process when processes is 1
+    '''
+    if processes == 1:
+        loadAgent(prefs)
+        for mediaFile in mediaFiles:
+            yield parseMediaFile(mediaFile)
+        return
+
+    pool = multiprocessing.Pool(processes, loadAgent, (prefs,))
+    try:
+        for values in pool.imap(parseMediaFile, mediaFiles, chunkSize):
+            yield values
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Parses media files with the agent's series parsers and writes the results as JSON lines")
+    parser.add_argument('paths', nargs='+', help='directories to parse')
+    parser.add_argument('--processes', type=int, default=None, help='number of parser processes - defaults to the number of CPUs')
+    parser.add_argument('--chunk-size', type=int, default=64, help='number of files sent to a parser process at a time')
+    parser.add_argument('--prefs', default='{}', help='plugin preferences as JSON e.g. {"episode.title.scrub.enabled": false}')
+    parser.add_argument('--all', action='store_true', help='parse every file instead of only the media files')
+    parser.add_argument('--unmatched', action='store_true', help='only write the files that no parser matches')
+    args = parser.parse_args()
+
+    extensions = None if args.all else MEDIA_FILE_EXTENSIONS
+    counts = {'files': 0, 'matched': 0, 'unmatched': 0, 'errors': 0}
+    startTime = time.time()
+    for values in parseMediaFiles(findMediaFiles(args.paths, extensions), args.processes, args.chunk_size, json.loads(args.prefs)):
+        counts['files'] = counts['files'] + 1
+        if 'error' in values:
+            counts['errors'] = counts['errors'] + 1
+        elif values['matched']:
+            counts['matched'] = counts['matched'] + 1
+        else:
+            counts['unmatched'] = counts['unmatched'] + 1
+        if args.unmatched and values['matched']:
+            continue
+        sys.stdout.write(json.dumps(values, sort_keys=True) + '\n')
+    elapsed = time.time() - startTime
+    counts['filesPerSecond'] = round(counts['files'] / elapsed, 1) if elapsed > 0 else None
+    sys.stderr.write(json.dumps(counts, sort_keys=True) + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+'''
+Benchmarks the agent's file name matching with pathological media file paths - very long names and deeply nested
+directories that the parser patterns backtrack over. Every case is matched by the agent's match engine and by searching
+every parser pattern in priority order, which is what the engine did before it skipped the patterns whose tokens are
+missing from the path. Both have to find the same parser, pattern and values.
+
+    python2.7 Tools/pathbenchmark.py --length 2000 --depth 40
+'''
+from __future__ import print_function
+
+import argparse, json, time
+
+import plexstub
+
+def createCases(length, depth):
+    '''
+    Creates the pathological paths by name - each case repeats a fragment that looks like the start of a date, an
+    episode number or a season folder without completing it
+    '''
+    def repeat(fragment):
+        return (fragment * (length // len(fragment) + 1))[:length]
+    nested = '/'.join('%02d - Season %d' % (level % 100, level) for level in range(depth))
+    return [
+        ('long name', '/library/Show/' + repeat('Show Title ') + '.mp4'),
+        ('long digits', '/library/Show/' + repeat('12 ') + '.mp4'),
+        ('long partial dates', '/library/Show/' + repeat('2012-09 ') + '.mp4'),
+        ('long partial times', '/library/Show/2012-09-19 ' + repeat('13 00 ') + '.mp4'),
+        ('long episode letters', '/library/Show/' + repeat('e s1 c2 ') + '.mp4'),
+        ('long no extension', '/library/Show/' + repeat('2012-09-19 s01e02 ')),
+        ('deep folders', '/library/' + nested + '/Show Title.mp4'),
+        ('deep year folders', '/library/' + '/'.join(str(2000 + level) for level in range(depth)) + '/' + repeat('09-19 ')),
+        ('deep matching', '/library/' + nested + '/Show - s2012e09 - ' + repeat('Episode Title ') + '.mp4'),
+        ('deep dated', '/library/' + nested + '/2012-09-19 - ' + repeat('Episode Title ') + '.mp4')
+    ]
+
+def searchPatterns(engine, mediaFile):
+    '''
+    Searches every parser pattern in priority order
+    '''
+    for pattern in engine.patterns:
+        parser, patternIndex, regex = pattern[:3]
+        match = regex.search(mediaFile)
+        if match:
+            return parser, patternIndex, match
+    return None, None, None
+
+def timeMatches(matchFunction, mediaFile, repeat):
+    startTime = time.time()
+    for count in range(repeat):
+        result = matchFunction(mediaFile)
+    return (time.time() - startTime) / repeat, result
+
+def describe(result):
+    parser, patternIndex, match = result
+    if parser is None:
+        return None
+    return type(parser).__name__, patternIndex, match.groupdict()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the agent's file name matching with pathological paths")
+    parser.add_argument('--length', type=int, default=1000, help='number of characters of the long names')
+    parser.add_argument('--depth', type=int, default=30, help='number of nested directories')
+    parser.add_argument('--repeat', type=int, default=3, help='number of times each path is matched')
+    parser.add_argument('--json', action='store_true', help='write the results of every case as a JSON line')
+    args = parser.parse_args()
+
+    agent = plexstub.loadAgent()
+    engine = agent['SERIES_PARSER_ENGINE']
+    failed = False
+    for name, mediaFile in createCases(args.length, args.depth):
+        engineTime, engineResult = timeMatches(engine.match, mediaFile, args.repeat)
+        patternsTime, patternsResult = timeMatches(lambda path: searchPatterns(engine, path), mediaFile, args.repeat)
+        same = describe(engineResult) == describe(patternsResult)
+        failed = failed or not same
+        result = {
+            'case': name,
+            'pathLength': len(mediaFile),
+            'matched': engineResult[0] is not None,
+            'engineMs': round(engineTime * 1000, 3),
+            'allPatternsMs': round(patternsTime * 1000, 3),
+            'speedup': round(patternsTime / engineTime, 1) if engineTime > 0 else None,
+            'same': same
+        }
+        if args.json:
+            print(json.dumps(result, sort_keys=True))
+        else:
+            print('%(case)-22s %(pathLength)6d chars  matched %(matched)-5s  engine %(engineMs)10.3f ms  all patterns %(allPatternsMs)10.3f ms  '
+                  'speedup %(speedup)6sx  same %(same)s' % result)
+    if failed:
+        raise SystemExit('the engine and the pattern search found different results')
+
+if __name__ == '__main__':
+    main()
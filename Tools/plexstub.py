@@ -0,0 +1,301 @@
+'''
+Stand-ins for the Plex Framework globals and the Plex Media Server API so the agent in Contents/Code can be run
+outside of Plex Media Server. The agent is Python 2 code - run the tools with Python 2.7
+'''
+from __future__ import print_function
+
+import json, os, pickle, random, sys, threading, time
+
+try:
+    import BaseHTTPServer, SocketServer, urlparse
+except ImportError:
+    import http.server as BaseHTTPServer, socketserver as SocketServer, urllib.parse as urlparse
+
+from xml.sax.saxutils import quoteattr
+
+BUNDLE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+AGENT_PATH = os.path.join(BUNDLE_PATH, 'Contents', 'Code', '__init__.py')
+DEFAULT_PREFS_PATH = os.path.join(BUNDLE_PATH, 'Contents', 'DefaultPrefs.json')
+
+def loadDefaultPrefs():
+    '''
+    Reads the default values of the plugin preferences from DefaultPrefs.json
+    '''
+    prefs = {}
+    with open(DEFAULT_PREFS_PATH) as prefsFile:
+        for pref in json.load(prefsFile):
+            value = pref['default']
+            if pref['type'] == 'bool':
+                value = value == 'true'
+            prefs[pref['id']] = value
+    return prefs
+
+class Prefs(object):
+    '''
+        Plugin preferences - the defaults from DefaultPrefs.json overridden by the passed values
+    '''
+
+    def __init__(self, values=None):
+        self.values = loadDefaultPrefs()
+        self.values.update(values or {})
+
+    def __getitem__(self, prefId):
+        return self.values.get(prefId)
+
+class Log(object):
+    '''
+        Logger - the messages are formatted and written to the stream only when verbose is set
+    '''
+
+    def __init__(self, verbose=False, stream=sys.stderr):
+        self.verbose = verbose
+        self.stream = stream
+        self.count = 0
+
+    def __call__(self, message, *args):
+        self.count = self.count + 1
+        if self.verbose:
+            if args:
+                message = message % args
+            self.stream.write(message + '\n')
+
+    Debug = Info = Warn = Error = Exception = Critical = __call__
+
+class Storage(object):
+
+    def load(self, filePath, binary=True):
+        with open(filePath, 'rb') as storedFile:
+            return storedFile.read()
+
+class Core(object):
+    storage = Storage()
+
+class Data(object):
+    '''
+        Plugin data storage - objects are pickled into files in the data directory or kept in memory when there
+        is no data directory
+    '''
+
+    def __init__(self, dataPath=None):
+        self.dataPath = dataPath
+        self.objects = {}
+        if dataPath is not None and not os.path.isdir(dataPath):
+            os.makedirs(dataPath)
+
+    def Exists(self, name):
+        if self.dataPath is None:
+            return name in self.objects
+        return os.path.exists(os.path.join(self.dataPath, name))
+
+    def LoadObject(self, name):
+        if self.dataPath is None:
+            return pickle.loads(self.objects[name])
+        with open(os.path.join(self.dataPath, name), 'rb') as dataFile:
+            return pickle.load(dataFile)
+
+    def SaveObject(self, name, obj):
+        if self.dataPath is None:
+            self.objects[name] = pickle.dumps(obj, 2)
+            return
+        with open(os.path.join(self.dataPath, name), 'wb') as dataFile:
+            pickle.dump(obj, dataFile, 2)
+
+    def Remove(self, name):
+        if self.dataPath is None:
+            del self.objects[name]
+            return
+        os.remove(os.path.join(self.dataPath, name))
+
+class Agent(object):
+    class TV_Shows(object):
+        pass
+
+class Language(object):
+    @staticmethod
+    def All():
+        return []
+
+class Locale(object):
+    Language = Language
+
+class MetadataSearchResult(object):
+
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+def loadAgent(dataPath=None, prefs=None, verbose=False):
+    '''
+    Executes the agent with the stand-in framework globals and returns the agent's namespace. The plugin data is
+    kept in memory when no data directory is passed
+    '''
+    namespace = {
+        '__name__': 'ExtendedPersonalMedia',
+        'Prefs': Prefs(prefs),
+        'Log': Log(verbose),
+        'Core': Core(),
+        'Data': Data(dataPath),
+        'Agent': Agent,
+        'Locale': Locale,
+        'MetadataSearchResult': MetadataSearchResult
+    }
+    with open(AGENT_PATH) as agentFile:
+        source = agentFile.read()
+    exec(compile(source, AGENT_PATH, 'exec'), namespace)
+    return namespace
+
+class Item(object):
+    '''
+        Plex media and metadata object - attributes are set from the keyword arguments
+    '''
+
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+class ItemMap(dict):
+    '''
+        Plex metadata child map - children are created on first access
+    '''
+
+    def __init__(self, factory):
+        dict.__init__(self)
+        self.factory = factory
+
+    def __missing__(self, key):
+        value = self[key] = self.factory()
+        return value
+
+def createEpisodeMetadata():
+    return Item(title=None, summary=None, originally_available_at=None)
+
+def createSeasonMetadata():
+    return Item(index=None, title=None, summary=None, episodes=ItemMap(createEpisodeMetadata))
+
+def createShowMetadata():
+    return Item(title=None, summary=None, originally_available_at=None, studio=None, genres=None,
+                seasons=ItemMap(createSeasonMetadata))
+
+class PlexRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    '''
+        Answers the metadata requests and records the season updates sent by the agent
+    '''
+    protocol_version = 'HTTP/1.1'
+    # send every response in one write so Nagle's algorithm does not delay it
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.countRequest('GET')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.isFailure():
+            self.sendError()
+            return
+        ratingKey = urlparse.urlparse(self.path).path.rstrip('/').split('/')[-1]
+        title, summary = self.server.getSeason(ratingKey)
+        body = '<?xml version="1.0" encoding="UTF-8"?><MediaContainer size="1" librarySectionID="%s"><Directory ratingKey=%s title=%s summary=%s/></MediaContainer>' % (
+            self.server.librarySectionId, quoteattr(ratingKey), quoteattr(title), quoteattr(summary))
+        self.sendResponse(body)
+
+    def do_PUT(self):
+        self.server.countRequest('PUT')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if self.server.isFailure():
+            self.sendError()
+            return
+        params = dict((name, values[0]) for name, values in urlparse.parse_qs(urlparse.urlparse(self.path).query, keep_blank_values=True).items())
+        self.server.putSeason(params.get('id'), params.get('title.value'), params.get('summary.value'))
+        self.sendResponse('')
+
+    def sendError(self):
+        self.server.countRequest('failed')
+        self.sendResponse('', self.server.failureStatus)
+
+    def sendResponse(self, body, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class PlexStandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    '''
+        Local stand-in for the Plex Media Server API. Keeps the season titles and summaries that were sent so
+        later requests see them, and counts the requests by method. Every request waits latency seconds, a
+        failureRate fraction of the requests and the next failNext() requests are answered with failureStatus
+    '''
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, librarySectionId='1', latency=0, failureRate=0, failureStatus=503, seed=1):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', port), PlexRequestHandler)
+        self.librarySectionId = librarySectionId
+        self.latency = latency
+        self.failureRate = failureRate
+        self.failureStatus = failureStatus
+        self.failures = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.seasons = {}
+        self.requests = {}
+        self.thread = None
+
+    def countRequest(self, method):
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+
+    def failNext(self, count):
+        '''
+        Answers the next count requests with the failure status
+        '''
+        with self.lock:
+            self.failures = count
+
+    def isFailure(self):
+        with self.lock:
+            if self.failures > 0:
+                self.failures = self.failures - 1
+                return True
+            return self.failureRate > 0 and self.random.random() < self.failureRate
+
+    def getSeason(self, ratingKey):
+        with self.lock:
+            return self.seasons.get(ratingKey, ('', ''))
+
+    def putSeason(self, ratingKey, title, summary):
+        with self.lock:
+            currentTitle, currentSummary = self.seasons.get(ratingKey, ('', ''))
+            if title is not None:
+                currentTitle = title
+            if summary is not None:
+                currentSummary = summary
+            self.seasons[ratingKey] = (currentTitle, currentSummary)
+
+    def getRequestCounts(self):
+        with self.lock:
+            return dict(self.requests)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def connectAgent(namespace, server, token='benchmark'):
+    '''
+    Points the agent's Plex API client at the stand-in server
+    '''
+    os.environ['PLEXTOKEN'] = token
+    host, port = server.server_address
+    namespace['PLEX_HTTP_CLIENT'] = namespace['PlexHttpClient'](host, port, namespace['PLEX_API_TIMEOUT'], namespace['PLEX_API_MAX_IDLE_CONNECTIONS'],
+                                                                namespace['PLEX_API_CIRCUIT_BREAKER'])